@@ -0,0 +1,89 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure the cost of accessing and calling component methods with and without callbacks for the previous implementation
+of klever.core.components.CallbacksCaller that wrapped public callables on each access and for the current one.
+
+Usage: python3 benchmarks/callbacks_caller.py [number of iterations]
+"""
+
+import logging
+import sys
+import timeit
+
+from klever.core.components import CALLBACK_KINDS, CallbacksCaller
+
+
+class LegacyCallbacksCaller:
+    def __getattribute__(self, name):
+        attr = object.__getattribute__(self, name)
+        if callable(attr) and not attr.__name__.startswith('_'):
+            def callbacks_caller(*args, **kwargs):
+                ret = None
+
+                for kind in CALLBACK_KINDS:
+                    if kind in self.callbacks and name in self.callbacks[kind]:
+                        for component, callback in self.callbacks[kind][name]:
+                            self.logger.debug(
+                                'Invoke {0} callback of component "{1}" for "{2}"'.format(kind, component, name))
+                            ret = callback(self)
+                    elif kind == 'instead':
+                        if args and type(args[0]).__name__.startswith('KleverSubcomponent'):
+                            ret = attr(*args[1:], **kwargs)
+                        else:
+                            ret = attr(*args, **kwargs)
+
+                return ret
+
+            return callbacks_caller
+        else:
+            return attr
+
+
+def make_component(base):
+    class BenchmarkComponent(base):
+        def __init__(self, callbacks):
+            self.logger = logging.getLogger('benchmark')
+            self.conf = {}
+            self.callbacks = callbacks
+
+        def method(self):
+            return self.conf
+
+        def method_with_callback(self):
+            return self.conf
+
+    return BenchmarkComponent({'after': {'method_with_callback': [('Benchmark', lambda context: None)]}})
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    print('{:<28}{:>14}{:>14}'.format('Operation (ns per op)', 'before', 'after'))
+    for title, stmt in (('data attribute access', 'c.conf'),
+                        ('method call', 'c.method()'),
+                        ('method with callback call', 'c.method_with_callback()')):
+        results = []
+        for base in (LegacyCallbacksCaller, CallbacksCaller):
+            component = make_component(base)
+            results.append(min(timeit.repeat(stmt, globals={'c': component}, number=number, repeat=3)) / number * 1e9)
+        print('{:<28}{:>14.1f}{:>14.1f}'.format(title, *results))
+
+
+if __name__ == '__main__':
+    main()
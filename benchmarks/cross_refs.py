@@ -0,0 +1,55 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure time of removing highlights overlapped by references from many overlapping macro expansions for comparing each
+reference with all highlights (as before) and for klever.core.highlight.Highlight#extra_highlight.
+
+Usage: python3 benchmarks/cross_refs.py [number of lines] [number of nested macro expansions per line]
+"""
+
+import copy
+import sys
+import time
+
+from klever.core.highlight import Highlight
+from klever.core.test_cross_refs import logger, overlapping_macro_expansions, reference_extra_highlight
+
+
+def main():
+    lines_numb = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    expansions_numb = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    src, expansions = overlapping_macro_expansions(lines_numb, expansions_numb)
+    extra_highlights = [['MacroExpansionRefFrom', *expansion[0]] for expansion in expansions]
+    highlight = Highlight(logger, src)
+    highlight.highlight()
+    print('{0} highlights, {1} references'.format(len(highlight.highlights), len(extra_highlights)))
+
+    start = time.time()
+    expected = reference_extra_highlight(copy.deepcopy(highlight.highlights), extra_highlights)
+    print('Comparing with all highlights: {0:.2f} s'.format(time.time() - start))
+
+    start = time.time()
+    highlight.extra_highlight(extra_highlights)
+    print('Indexed highlights: {0:.2f} s'.format(time.time() - start))
+
+    assert highlight.highlights == expected
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Compare bytes written and CPU time spent for pretty printed JSON with sorted keys (the previous behaviour of Klever Core)
+and for compact JSON written by klever.core.utils.json_dump() when intermediate files should not be kept. Artifacts
+resemble per-task data that is serialized many times: reports and fragment/task descriptions.
+
+Usage: python3 benchmarks/json_serialization.py [number of tasks]
+"""
+
+import io
+import sys
+import time
+
+from klever.core.utils import json_dump, json_load
+
+
+def make_task_artifacts(i):
+    report = {
+        'identifier': '/{0}/VTGW/drivers/usb/serial/module{0}.ko/linux:drivers:usb:core'.format(i),
+        'parent': '/{0}/VTGW'.format(i),
+        'type': 'verification',
+        'attrs': [{'name': 'Program fragment', 'value': 'drivers/usb/serial/module{0}.ko'.format(i), 'compare': True},
+                  {'name': 'Requirements specification', 'value': 'linux:drivers:usb:core', 'compare': True}],
+        'resources': {'cpu_time': 1234 + i, 'wall_time': 4321 + i, 'memory': 1024 * 1024 * (i + 1)}
+    }
+    desc = {
+        'id': 'drivers/usb/serial/module{0}.ko'.format(i),
+        'fragment': 'drivers/usb/serial/module{0}.ko'.format(i),
+        'grps': [{'id': 'file{0}.c'.format(j),
+                  'Extra CCs': [{'CC': 'cmd{0}.json'.format(k), 'in': ['drivers/usb/serial/file{0}.c'.format(k)]}
+                                for k in range(j, j + 5)]}
+                 for j in range(20)],
+        'deps': {'file{0}.c'.format(j): ['file{0}.c'.format(k) for k in range(j)] for j in range(20)}
+    }
+    return report, desc
+
+
+def measure(artifacts, pretty):
+    written = 0
+    start = time.process_time()
+    for artifact in artifacts:
+        fp = io.StringIO()
+        json_dump(artifact, fp, pretty)
+        written += len(fp.getvalue().encode('utf8'))
+        fp.seek(0)
+        json_load(fp)
+    return written, time.process_time() - start
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    artifacts = [artifact for i in range(tasks) for artifact in make_task_artifacts(i)]
+
+    for title, pretty in (('Pretty (indent, sorted keys)', True), ('Compact', False)):
+        written, cpu_time = measure(artifacts, pretty)
+        print('{0}: {1} bytes ({2:.0f} per task), {3:.3f} s of CPU time ({4:.1f} us per task)'
+              .format(title, written, written / tasks, cpu_time, cpu_time * 1000000 / tasks))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Compare time and peak RSS of getting basic information on original sources when functions are requested from Clade
+for each source file separately (as before) and for batches of source files by
+klever.core.job.get_original_sources_basic_info. Each mode is measured in a separate process, so that peak RSS of one
+mode does not affect another one. Use a build base of a Linux kernel to get representative results.
+
+Usage: python3 benchmarks/original_sources_basic_info.py build_base [batch size]
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+
+from clade import Clade
+
+from klever.core.job import get_original_sources_basic_info, FUNCTIONS_BATCH_SIZE
+
+
+def measure(build_base, batch_size, results):
+    clade = Clade(build_base)
+    meta = clade.get_meta()
+    working_src_trees = meta.get('working source trees', [meta['build_dir']])
+
+    start = time.time()
+    src_files_info = get_original_sources_basic_info(clade, working_src_trees, batch_size)
+    # ru_maxrss is measured in kilobytes on Linux.
+    results.put((time.time() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, len(src_files_info),
+                 sum(len(info[1]) for info in src_files_info.values())))
+
+
+def main():
+    build_base = sys.argv[1]
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else FUNCTIONS_BATCH_SIZE
+
+    results = multiprocessing.Queue()
+    for mode, size in (('per-file', 1), ('bulk', batch_size)):
+        p = multiprocessing.Process(target=measure, args=(build_base, size, results))
+        p.start()
+        duration, peak_rss, files, functions = results.get()
+        p.join()
+        print('{0:>8}: {1:.2f} s, peak RSS {2:.0f} MiB ({3} source files, {4} function definitions)'
+              .format(mode, duration, peak_rss, files, functions))
+
+
+if __name__ == '__main__':
+    main()
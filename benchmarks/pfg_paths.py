@@ -0,0 +1,123 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure time of matching expressions of a fragmentation set against files of a Linux kernel sized program by globbing
+the filesystem (as before) and by klever.core.pfg.abstractions.paths.PathTrie#glob. The storage contains headers and
+other files that are not compiled as well.
+
+Usage: python3 benchmarks/pfg_paths.py [number of compiled files] [number of expressions]
+"""
+
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from klever.core.pfg.abstractions.paths import PathTrie
+
+
+def create_storage(storage, files_numb):
+    random.seed(0)
+    subsystems = ['drivers', 'fs', 'net', 'sound', 'kernel', 'mm', 'arch/x86', 'crypto', 'block', 'security']
+    dirs = []
+    for i in range(files_numb // 10):
+        subsystem = random.choice(subsystems)
+        depth = random.randint(1, 3)
+        dirs.append(os.path.join(subsystem, *('d{0}_{1}'.format(i, j) for j in range(depth))))
+
+    compiled_files = []
+    for i in range(files_numb):
+        directory = random.choice(dirs)
+        os.makedirs(os.path.join(storage, directory), exist_ok=True)
+        for ext in ('c', 'h', 'o'):
+            name = os.path.join(directory, 'f{0}.{1}'.format(i, ext))
+            open(os.path.join(storage, name), 'w').close()
+            if ext == 'c':
+                compiled_files.append(name)
+        # Hidden files are created by the build as well.
+        open(os.path.join(storage, directory, '.f{0}.o.cmd'.format(i)), 'w').close()
+
+    return compiled_files
+
+
+def get_expressions(compiled_files, expressions_numb):
+    expressions = []
+    for i in range(expressions_numb):
+        file = random.choice(compiled_files)
+        kind = i % 6
+        if kind == 0:
+            expressions.append(file)
+        elif kind == 1:
+            expressions.append(os.path.dirname(file))
+        elif kind == 2:
+            expressions.append(os.path.join(os.path.dirname(file), '*.c'))
+        elif kind == 3:
+            expressions.append(os.path.join(os.path.dirname(file), 'f?*'))
+        elif kind == 4:
+            # Modules and function names are not paths at all.
+            expressions.append('module{0}.ko'.format(i))
+        else:
+            expressions.append(os.path.join(file.split('/')[0], '**', os.path.basename(file)))
+
+    return expressions
+
+
+def filesystem_glob(pattern):
+    files = set(glob.glob(pattern, recursive=True))
+    dirs = {f for f in files if os.path.isdir(f)}
+    files = {f for f in files if os.path.isfile(f)}
+    return files, dirs
+
+
+def main():
+    files_numb = int(sys.argv[1]) if len(sys.argv) > 1 else 25000
+    expressions_numb = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+
+    storage = tempfile.mkdtemp()
+    try:
+        compiled_files = create_storage(storage, files_numb)
+        abs_files = [os.path.join(storage, file) for file in compiled_files]
+        patterns = [os.path.join(storage, expr) for expr in get_expressions(compiled_files, expressions_numb)]
+
+        start = time.time()
+        expected = [filesystem_glob(pattern) for pattern in patterns]
+        print('Filesystem glob: {0:.2f}s'.format(time.time() - start))
+
+        start = time.time()
+        paths = PathTrie(abs_files)
+        print('Path trie building: {0:.2f}s'.format(time.time() - start))
+
+        start = time.time()
+        results = [paths.glob(pattern) for pattern in patterns]
+        print('Path trie glob: {0:.2f}s'.format(time.time() - start))
+
+        # The trie does not know files that are not compiled but they are not taken into account anyway.
+        abs_files = set(abs_files)
+        abs_dirs = {os.path.dirname(file) for file in abs_files}
+        for pattern, (files, dirs), (expected_files, expected_dirs) in zip(patterns, results, expected):
+            if files != expected_files & abs_files or dirs & abs_dirs != expected_dirs & abs_dirs:
+                raise RuntimeError('Results for "{0}" differ'.format(pattern))
+    finally:
+        shutil.rmtree(storage)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure throughput of allocating report identifiers by many concurrent processes for the previous approach based on
+a shared counter protected by a lock and for klever.core.utils.ReportIdentifiers.
+
+Usage: python3 benchmarks/report_identifiers.py [number of workers] [number of identifiers per worker]
+"""
+
+import multiprocessing
+import sys
+import time
+
+from klever.core.utils import ReportIdentifiers
+
+
+def allocate_with_lock(report_id, number, barrier, results):
+    barrier.wait()
+    start = time.time()
+    ids = []
+    for _ in range(number):
+        with report_id.get_lock():
+            ids.append(report_id.value)
+            report_id.value += 1
+    results.put((start, time.time(), ids))
+
+
+def allocate_without_lock(report_id, number, barrier, results):
+    barrier.wait()
+    start = time.time()
+    ids = [report_id.next() for _ in range(number)]
+    results.put((start, time.time(), ids))
+
+
+def measure(target, report_id, workers_num, number):
+    barrier = multiprocessing.Barrier(workers_num + 1)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=target, args=(report_id, number, barrier, results))
+               for _ in range(workers_num)]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    starts = []
+    ends = []
+    ids = []
+    for _ in workers:
+        start, end, worker_ids = results.get()
+        starts.append(start)
+        ends.append(end)
+        ids.extend(worker_ids)
+    # Do not take into account time spent for passing identifiers to check them.
+    duration = max(ends) - min(starts)
+
+    for worker in workers:
+        worker.join()
+
+    if len(set(ids)) != workers_num * number:
+        raise ValueError('Some report identifiers collided')
+
+    return duration
+
+
+def main():
+    workers_num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    print('{} workers allocate {} report identifiers each'.format(workers_num, number))
+    for title, target, report_id in (('shared counter with lock', allocate_with_lock, multiprocessing.Value('i', 1)),
+                                     ('per-process prefix', allocate_without_lock, ReportIdentifiers())):
+        duration = measure(target, report_id, workers_num, number)
+        print('{:<28}{:>10.3f} s{:>14.0f} ids/s'.format(title, duration, workers_num * number / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Estimate the number of requests to Klever Bridge necessary to schedule, to cancel and to remove verification tasks of a
+synthetic job when each task is scheduled by VTGW individually and when VRP schedules all tasks generated since its
+previous iteration by bulks of at most klever.core.session.Session.TASKS_BULK_SIZE tasks. Tasks are generated by the given
+number of workers, generation of each task takes random time with the given mean.
+
+Usage: python3 benchmarks/task_requests.py [number of tasks] [number of workers] [mean generation time]
+"""
+
+import math
+import random
+import sys
+
+# See klever.core.session.Session.TASKS_BULK_SIZE (the module can not be imported without requests).
+TASKS_BULK_SIZE = 100
+# VRP checks for new tasks each second.
+VRP_PERIOD = 1
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    mean_generation_time = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
+
+    random.seed(0)
+    generation_times = []
+    worker_times = [0.0] * workers
+    for _ in range(tasks):
+        worker = min(range(workers), key=worker_times.__getitem__)
+        worker_times[worker] += random.expovariate(1 / mean_generation_time)
+        generation_times.append(worker_times[worker])
+
+    # Tasks generated within the same VRP period are scheduled together.
+    periods = {}
+    for generation_time in generation_times:
+        period = math.ceil(generation_time / VRP_PERIOD)
+        periods[period] = periods.get(period, 0) + 1
+
+    individual = 2 * tasks
+    bulk_schedule = sum(math.ceil(number / TASKS_BULK_SIZE) for number in periods.values())
+    # Removal of failed tasks is still performed by RP per task, removal after uploading reports goes together with
+    # uploading report batches.
+    print('Tasks: {0}, generation lasts {1:.0f} s'.format(tasks, max(generation_times)))
+    print('Individual requests (schedule + remove): {0}'.format(individual))
+    print('Bulk requests (schedule + remove): {0} + at most one per reports batch'.format(bulk_schedule))
+    print('Saved at least {0} requests ({1:.1f}%)'.format(individual - 2 * bulk_schedule,
+                                                         100 * (individual - 2 * bulk_schedule) / individual))
+    # Unfinished tasks are cancelled by klever.core.session.Session.cancel_tasks() by a single request.
+    print('Individual requests to cancel all tasks: {0}'.format(tasks))
+    print('Bulk requests to cancel all tasks: 1')
+
+
+if __name__ == '__main__':
+    main()
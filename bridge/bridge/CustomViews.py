@@ -145,13 +145,41 @@ class StreamingResponseAPIView(APIView):
 
         file_size = getattr(generator, 'size', None)
 
+        # Generators of stored files can be rewound to continue interrupted downloads
+        range_start = None
+        if file_size and hasattr(generator, 'seek'):
+            range_start = self.__get_range_start(file_size)
+            if range_start:
+                generator.seek(range_start)
+
         mimetype = mimetypes.guess_type(os.path.basename(file_name))[0]
         response = StreamingHttpResponse(generator, content_type=mimetype)
-        if file_size:
+        if range_start:
+            response.status_code = 206
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(range_start, file_size - 1, file_size)
+            response['Content-Length'] = file_size - range_start
+        elif file_size:
             response['Content-Length'] = file_size
+        if file_size and hasattr(generator, 'seek'):
+            response['Accept-Ranges'] = 'bytes'
+        if getattr(generator, 'checksum', None):
+            response['X-Checksum-MD5'] = generator.checksum
         response['Content-Disposition'] = 'attachment; filename="{}"'.format(file_name)
         return response
 
+    def __get_range_start(self, file_size):
+        # Just open ranges like "bytes=1024-" are supported, other ones are ignored, so the whole file is returned
+        range_header = self.request.META.get('HTTP_RANGE', '')
+        if not range_header.startswith('bytes=') or not range_header.endswith('-'):
+            return None
+        try:
+            range_start = int(range_header[len('bytes='):-1])
+        except ValueError:
+            return None
+        if not 0 < range_start < file_size:
+            return None
+        return range_start
+
     def get(self, *args, **kwargs):
         if self.http_method != 'get':
             return HttpResponseNotAllowed(['get'])
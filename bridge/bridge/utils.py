@@ -21,6 +21,7 @@ import logging
 import os
 import pika
 import shutil
+import tarfile
 import tempfile
 import time
 import zipfile
@@ -30,6 +31,7 @@ from urllib.parse import quote
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from django.db import connection, transaction
 from django.db.models import FileField
 from django.http import HttpResponseBadRequest, Http404
@@ -172,6 +174,31 @@ def extract_archive(archive):
         return tmp_dir_name
 
 
+def extract_reports_bulk(bulk):
+    """
+    Extract reports and report file archives uploaded by Klever Core as a single compressed TAR stream.
+    :param bulk: uploaded file.
+    :return: list of reports and dictionary with report file archives.
+    """
+    reports = None
+    archives = {}
+    with tarfile.open(fileobj=bulk, mode='r|*') as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            member_fp = tar.extractfile(member)
+            if member.name == 'reports.json':
+                reports = json.loads(member_fp.read().decode('utf8'))
+            else:
+                archive = TemporaryUploadedFile(member.name, 'application/zip', member.size, None)
+                shutil.copyfileobj(member_fp, archive)
+                archive.seek(0)
+                archives[member.name] = archive
+    if reports is None:
+        raise ValueError('Reports were not attached')
+    return reports, archives
+
+
 def unique_id():
     return hashlib.md5(now().strftime("%Y%m%d%H%M%S%f%z").encode('utf8')).hexdigest()
 
@@ -16,6 +16,7 @@
 #
 
 import json
+import tarfile
 
 from django.http import HttpResponse
 from django.template import loader
@@ -30,7 +31,7 @@ from rest_framework.status import HTTP_403_FORBIDDEN
 from rest_framework.views import APIView
 
 from bridge.vars import DECISION_STATUS, LOG_FILE
-from bridge.utils import logger, BridgeException, ArchiveFileContent
+from bridge.utils import logger, BridgeException, ArchiveFileContent, extract_reports_bulk
 from bridge.access import ServicePermission, ViewJobPermission
 from bridge.CustomViews import TemplateAPIRetrieveView
 from tools.profiling import LoggedCallMixin
@@ -109,14 +110,21 @@ class UploadReportView(LoggedCallMixin, APIView):
         if decision.status != DECISION_STATUS[2][0]:
             raise exceptions.APIException('Reports can be uploaded only for processing decisions')
 
-        if 'report' in request.POST:
+        archives = request.FILES
+        if 'bulk' in request.FILES:
+            # Reports and report file archives are compressed together
+            try:
+                data, archives = extract_reports_bulk(request.FILES['bulk'])
+            except (ValueError, tarfile.TarError) as e:
+                raise exceptions.APIException('Reports bulk is corrupted: {}'.format(e))
+        elif 'report' in request.POST:
             data = [json.loads(request.POST['report'])]
         elif 'reports' in request.POST:
             data = json.loads(request.POST['reports'])
         else:
             raise exceptions.APIException('Report json data is required')
         try:
-            UploadReport(decision, request.FILES).upload_all(data)
+            UploadReport(decision, archives).upload_all(data)
         except CheckArchiveError as e:
             return Response({'ZIP error': str(e)}, status=HTTP_403_FORBIDDEN)
         return Response({})
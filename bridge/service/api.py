@@ -15,6 +15,14 @@
 # limitations under the License.
 #
 
+import json
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
 from rest_framework import exceptions
 from rest_framework.generics import (
     get_object_or_404, RetrieveAPIView, CreateAPIView, RetrieveDestroyAPIView, RetrieveUpdateAPIView
@@ -67,14 +75,124 @@ class TaskAPIViewset(LoggedCallMixin, ModelViewSet):
         return super().filter_queryset(queryset)
 
     def perform_destroy(self, instance):
-        if instance.status not in {TASK_STATUS[2][0], TASK_STATUS[3][0], TASK_STATUS[4][0]}:
-            raise exceptions.ValidationError({'status': 'The task is not finished'})
-        if instance.status == TASK_STATUS[2][0]:
-            if not Solution.objects.filter(task=instance).exists():
-                raise exceptions.ValidationError({'solution': 'The task solution was not uploaded'})
+        check_task_removal(instance, Solution.objects.filter(task=instance).exists())
         instance.delete()
 
 
+def check_task_removal(task, has_solution):
+    if task.status not in {TASK_STATUS[2][0], TASK_STATUS[3][0], TASK_STATUS[4][0]}:
+        raise exceptions.ValidationError({'status': 'The task is not finished'})
+    if task.status == TASK_STATUS[2][0] and not has_solution:
+        raise exceptions.ValidationError({'solution': 'The task solution was not uploaded'})
+
+
+class BulkTasksCreateView(LoggedCallMixin, APIView):
+    unparallel = [Decision]
+    permission_classes = (ServicePermission,)
+
+    def post(self, request):
+        try:
+            descriptions = json.loads(request.data['descriptions'])
+        except (KeyError, ValueError):
+            raise exceptions.ValidationError({'descriptions': 'JSON list of task descriptions is required'})
+
+        # Validate all tasks before creating any of them. Either all tasks are created or none of them if saving fails.
+        with transaction.atomic():
+            task_serializers = []
+            for i, description in enumerate(descriptions):
+                serializer = TaskSerializer(data={
+                    'job': request.data.get('job'),
+                    'description': description,
+                    'archive': request.FILES.get('archive {}'.format(i))
+                }, fields={'id', 'job', 'archive', 'description'}, context={'request': request})
+                serializer.is_valid(raise_exception=True)
+                task_serializers.append(serializer)
+            task_ids = [serializer.save().id for serializer in task_serializers]
+        return Response({'ids': task_ids})
+
+
+class BulkTasksCancelView(LoggedCallMixin, APIView):
+    unparallel = [Decision]
+    permission_classes = (ServicePermission,)
+
+    def post(self, request):
+        # Validate all tasks before cancelling any of them. Either all tasks are cancelled or none of them.
+        with transaction.atomic():
+            decisions = {}
+            task_serializers = []
+            for task in Task.objects.filter(id__in=request.data.get('ids', [])).select_related('decision__scheduler'):
+                # Already finished tasks are skipped like ones that are removed
+                if task.status not in {TASK_STATUS[0][0], TASK_STATUS[1][0]}:
+                    continue
+                # Counters of tasks are updated for the same decision object, otherwise they are overwritten
+                task.decision = decisions.setdefault(task.decision_id, task.decision)
+                serializer = TaskSerializer(
+                    instance=task, data={'status': TASK_STATUS[4][0]}, fields={'id', 'status', 'error'}, partial=True
+                )
+                serializer.is_valid(raise_exception=True)
+                task_serializers.append(serializer)
+            for serializer in task_serializers:
+                serializer.save()
+        return Response({})
+
+
+class BulkTasksRemoveView(LoggedCallMixin, APIView):
+    unparallel = [Decision]
+    permission_classes = (ServicePermission,)
+
+    def post(self, request):
+        tasks = Task.objects.filter(id__in=request.data.get('ids', []))
+        with_solutions = set(Solution.objects.filter(task__in=tasks).values_list('task_id', flat=True))
+        for task in tasks:
+            check_task_removal(task, task.id in with_solutions)
+        tasks.delete()
+        return Response({})
+
+
+class TasksChangesView(APIView):
+    """
+    Return statuses of tasks of the given job changed since the given cursor. If nothing has changed, wait for changes
+    up to the given number of seconds (long polling). The request does not lock anything since it just reads tasks.
+    Nevertheless, it occupies a synchronous Gunicorn worker for up to max_timeout seconds, so the number of workers
+    (KLEVER_WORKERS) should exceed the number of jobs that are decided simultaneously, otherwise other requests will
+    wait for free workers.
+    """
+    permission_classes = (ServicePermission,)
+
+    # The maximum time to wait for changes and the period of checking for them
+    max_timeout = 30
+    check_period = 0.5
+    # Changes committed by concurrent transactions can get a bit earlier time than the cursor, so changes made within
+    # this period before the cursor are returned once again and clients should ignore changes they already know about.
+    # Just changes made after the cursor stop waiting. Changes of transactions lasting longer than this period can be
+    # still missed, so clients should request statuses of all tasks without the cursor from time to time
+    cursor_lag = timedelta(seconds=2)
+
+    def get(self, request, identifier):
+        cursor = None
+        if 'cursor' in request.query_params:
+            cursor = parse_datetime(request.query_params['cursor'])
+            if cursor is None:
+                raise exceptions.ValidationError({'cursor': 'Wrong cursor format'})
+        try:
+            timeout = min(float(request.query_params.get('timeout', 0)), self.max_timeout)
+        except ValueError:
+            raise exceptions.ValidationError({'timeout': 'Timeout should be a number'})
+
+        deadline = time.monotonic() + timeout
+        while True:
+            now = timezone.now()
+            queryset = Task.objects.filter(decision__identifier=identifier)
+            if cursor is None:
+                break
+            if queryset.filter(changed__gte=cursor).exists() or time.monotonic() >= deadline:
+                queryset = queryset.filter(changed__gte=cursor - self.cursor_lag)
+                break
+            time.sleep(self.check_period)
+
+        return Response({'cursor': now.isoformat(), 'tasks': list(queryset.values('id', 'status'))})
+
+
 class DownloadTaskArchiveView(StreamingResponseAPIView):
     permission_classes = (ServicePermission,)
 
@@ -76,7 +76,12 @@ class Task(WithFilesMixin, models.Model):
     error = models.CharField(max_length=1024, null=True)
     filename = models.CharField(max_length=256)
     archive = models.FileField(upload_to=SERVICE_DIR)
+    # MD5 checksum of the archive that is calculated once when the archive is stored
+    hash_sum = models.CharField(max_length=255, null=True)
     description = JSONField()
+    # Clients track status changes by this time rather than request statuses of all tasks again and again. Queryset
+    # update() does not set it automatically, so specify it explicitly there.
+    changed = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'task'
@@ -87,6 +92,7 @@ class Solution(WithFilesMixin, models.Model):
     task = models.OneToOneField(Task, models.CASCADE, related_name='solution')
     filename = models.CharField(max_length=256)
     archive = models.FileField(upload_to=SERVICE_DIR)
+    hash_sum = models.CharField(max_length=255, null=True)
     description = JSONField()
 
     class Meta:
@@ -26,7 +26,7 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers, exceptions, fields
 
 from bridge.vars import DECISION_STATUS, PRIORITY, SCHEDULER_TYPE, SCHEDULER_STATUS, TASK_STATUS
-from bridge.utils import logger, RMQConnect
+from bridge.utils import logger, file_checksum, RMQConnect
 from bridge.serializers import TimeStampField, DynamicFieldsModelSerializer
 
 from users.models import SchedulerUser
@@ -190,6 +190,7 @@ class TaskSerializer(DynamicFieldsModelSerializer):
 
     def create(self, validated_data):
         validated_data['filename'] = validated_data['archive'].name[:256]
+        validated_data['hash_sum'] = file_checksum(validated_data['archive'])
         validated_data['decision'] = validated_data.pop('job')
         instance = super().create(validated_data)
         self.update_decision(instance.decision, instance.status)
@@ -217,7 +218,7 @@ class TaskSerializer(DynamicFieldsModelSerializer):
 
     class Meta:
         model = Task
-        exclude = ('decision', 'filename')
+        exclude = ('decision', 'filename', 'hash_sum')
         extra_kwargs = {'archive': {'write_only': True}}
 
 
@@ -233,8 +234,9 @@ class SolutionSerializer(DynamicFieldsModelSerializer):
         return desc
 
     def create(self, validated_data):
-        # Set file name
+        # Set file name and checksum
         validated_data['filename'] = validated_data['archive'].name[:256]
+        validated_data['hash_sum'] = file_checksum(validated_data['archive'])
 
         # Get and validate decision
         decision = Decision.objects.only('id', 'status').get(id=validated_data['task'].decision_id)
@@ -259,7 +261,7 @@ class SolutionSerializer(DynamicFieldsModelSerializer):
 
     class Meta:
         model = Solution
-        exclude = ('decision', 'filename')
+        exclude = ('decision', 'filename', 'hash_sum')
         extra_kwargs = {'archive': {'write_only': True}}
 
 
@@ -419,7 +421,7 @@ class SchedulerSerializer(serializers.ModelSerializer):
             # Pending or processing tasks
             tasks_updated = Task.objects.filter(
                 status__in=[TASK_STATUS[0][0], TASK_STATUS[1][0]], decision=decision
-            ).update(error=self.task_error)
+            ).update(error=self.task_error, changed=now())
             decision.tasks_error += tasks_updated
             if scheduler.type == SCHEDULER_TYPE[0][0]:
                 if not decision.finish_date:
@@ -26,6 +26,12 @@ router = DefaultRouter()
 router.register('tasks', api.TaskAPIViewset, 'tasks')
 
 urlpatterns = [
+    # These should precede task details that are matched by the router
+    path('tasks/bulk/', api.BulkTasksCreateView.as_view()),
+    path('tasks/bulk-cancel/', api.BulkTasksCancelView.as_view()),
+    path('tasks/bulk-remove/', api.BulkTasksRemoveView.as_view()),
+    path('tasks/changes/<uuid:identifier>/', api.TasksChangesView.as_view()),
+
     path('', include(router.urls)),
     path('get_token/', obtain_auth_token),
     path('tasks/<int:pk>/download/', api.DownloadTaskArchiveView.as_view()),
@@ -22,7 +22,7 @@ from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
 from bridge.vars import DECISION_STATUS, SCHEDULER_TYPE, TASK_STATUS
-from bridge.utils import logger, BridgeException
+from bridge.utils import logger, file_checksum, BridgeException
 
 from users.models import SchedulerUser
 from jobs.models import FileSystem
@@ -233,17 +233,31 @@ class NodesData:
             self.configs.append(conf_data)
 
 
-class TaskArchiveGenerator(FileWrapper):
+class StoredArchiveGenerator(FileWrapper):
+    """
+    Stream stored archive by large blocks. Clients can verify downloaded archives with the checksum and resume
+    interrupted downloads starting from the given offset.
+    """
+    block_size = 1024 * 1024
+
+    def __init__(self, archive, name, checksum=None):
+        self.size = len(archive)
+        self.name = name
+        # Checksums are stored together with archives, so archives are read just for ones stored before that
+        self.checksum = checksum or file_checksum(archive)
+        super().__init__(archive, self.block_size)
+
+    def seek(self, offset):
+        self.filelike.seek(offset)
+
+
+class TaskArchiveGenerator(StoredArchiveGenerator):
     def __init__(self, task: Task):
         self._task = task
-        self.size = len(self._task.archive)
-        self.name = self._task.filename
-        super().__init__(self._task.archive, 8192)
+        super().__init__(self._task.archive, self._task.filename, self._task.hash_sum)
 
 
-class SolutionArchiveGenerator(FileWrapper):
+class SolutionArchiveGenerator(StoredArchiveGenerator):
     def __init__(self, solution: Solution):
         self._solution = solution
-        self.size = len(self._solution.archive)
-        self.name = self._solution.filename
-        super().__init__(self._solution.archive, 8192)
+        super().__init__(self._solution.archive, self._solution.filename, self._solution.hash_sum)
@@ -0,0 +1,239 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import functools
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+
+import clade
+
+
+# Results of these queries are cached by the Clade service. Other Clade methods and attributes are used directly.
+CACHED_QUERIES = {
+    'get_callgraph',
+    'get_functions_by_file',
+    'get_typedefs',
+    'get_variables',
+    'get_used_in_vars_functions',
+    'get_macros_expansions',
+    'get_ref_to',
+    'get_ref_from',
+    'get_meta'
+}
+
+# Klever Core starts the Clade service before starting components, so that all its child processes inherit its address.
+CLADE_SERVICE = {
+    'address': None,
+    'authkey': None
+}
+
+# Connections to the Clade service can not be shared by several processes.
+CONNECTIONS = {}
+
+
+class Clade:
+    """
+    Replacement for clade.Clade that sends queries from CACHED_QUERIES to the Clade service if it is started. Original
+    Clade object is created just when other methods or attributes are used.
+    """
+
+    def __init__(self, work_dir, cmds_file=None, conf=None, preset='base'):
+        self.__args = (work_dir, cmds_file, conf, preset)
+        # Clade objects with different arguments can give different results, so the service distinguishes them.
+        self.__key = (os.path.realpath(work_dir), os.path.realpath(cmds_file) if cmds_file else None,
+                      json.dumps(conf, sort_keys=True) if conf else None, preset)
+        self.__clade = None
+
+    def __getattr__(self, name):
+        # Private attributes are absent just for objects that are not initialized yet, e.g. during unpickling.
+        if name.startswith('_Clade__'):
+            raise AttributeError(name)
+
+        if name in CACHED_QUERIES and CLADE_SERVICE['address']:
+            return functools.partial(self.__query, name)
+
+        if self.__clade is None:
+            work_dir, cmds_file, conf, preset = self.__args
+            self.__clade = clade.Clade(work_dir=work_dir, cmds_file=cmds_file, conf=conf, preset=preset)
+
+        return getattr(self.__clade, name)
+
+    def __query(self, name, *args, **kwargs):
+        pid = os.getpid()
+        if pid not in CONNECTIONS:
+            CONNECTIONS[pid] = (multiprocessing.connection.Client(CLADE_SERVICE['address'],
+                                                                  authkey=CLADE_SERVICE['authkey']),
+                                threading.Lock())
+        connection, lock = CONNECTIONS[pid]
+
+        with lock:
+            connection.send((self.__key, name, args, kwargs))
+            is_ok, result = pickle.loads(connection.recv_bytes())
+
+        if not is_ok:
+            raise result
+
+        return result
+
+
+class CladeService(multiprocessing.Process):
+    """
+    Process answering Clade queries of all Klever Core processes through a Unix socket. Pickled results are kept in
+    the LRU cache which total size is limited, so repeated queries do not load and filter Clade data once again.
+    Besides, Clade objects keep data they loaded, so ones that were not used for IDLE_TIMEOUT seconds are dropped.
+    Thus, memory consumed by them is bounded by the number of build bases queried within that period.
+    """
+
+    IDLE_TIMEOUT = 300
+
+    def __init__(self, logger, address, authkey, cache_size):
+        super().__init__(name='KleverCladeService', daemon=True)
+        self.logger = logger
+        self.address = address
+        self.authkey = authkey
+        self.cache_size = cache_size
+        self.ready = multiprocessing.Event()
+
+        self.__clades = {}
+        self.__clades_lock = threading.Lock()
+        self.__cache = collections.OrderedDict()
+        self.__cache_total_size = 0
+        self.__cache_lock = threading.Lock()
+
+    def run(self):
+        listener = multiprocessing.connection.Listener(self.address, 'AF_UNIX', authkey=self.authkey)
+        self.ready.set()
+
+        while True:
+            try:
+                connection = listener.accept()
+            except (OSError, multiprocessing.AuthenticationError):
+                continue
+            threading.Thread(target=self.__serve, args=(connection,), daemon=True).start()
+
+    def __serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    key, name, args, kwargs = connection.recv()
+                except EOFError:
+                    return
+                connection.send_bytes(self.__query(key, name, args, kwargs))
+
+    def __query(self, key, name, args, kwargs):
+        query = (key, name, self.__freeze(args), self.__freeze(kwargs))
+
+        with self.__cache_lock:
+            if query in self.__cache:
+                self.__cache.move_to_end(query)
+                return self.__cache[query]
+
+        try:
+            with self.__clades_lock:
+                self.__drop_idle_clades(key)
+                if key not in self.__clades:
+                    work_dir, cmds_file, conf, preset = key
+                    self.__clades[key] = [clade.Clade(work_dir, cmds_file=cmds_file,
+                                                      conf=json.loads(conf) if conf else None, preset=preset),
+                                          threading.Lock(), None]
+                self.__clades[key][2] = time.monotonic()
+                clade_obj, lock, _ = self.__clades[key]
+
+            if name not in CACHED_QUERIES:
+                raise AttributeError('Clade query "{0}" is not supported'.format(name))
+
+            # Clade is not intended for concurrent use.
+            with lock:
+                result = pickle.dumps((True, getattr(clade_obj, name)(*args, **kwargs)), pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.logger.debug('Clade query "{0}" failed'.format(name), exc_info=True)
+            try:
+                return pickle.dumps((False, e), pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                return pickle.dumps((False, RuntimeError(traceback.format_exc())), pickle.HIGHEST_PROTOCOL)
+
+        # Results larger than the whole cache are not cached at all.
+        if len(result) <= self.cache_size:
+            with self.__cache_lock:
+                if query not in self.__cache:
+                    self.__cache[query] = result
+                    self.__cache_total_size += len(result)
+                    while self.__cache_total_size > self.cache_size:
+                        _, evicted = self.__cache.popitem(last=False)
+                        self.__cache_total_size -= len(evicted)
+
+        return result
+
+    def __drop_idle_clades(self, key):
+        now = time.monotonic()
+        for other_key, (_, lock, last_used) in list(self.__clades.items()):
+            # Clade objects that are queried right now are used.
+            if other_key != key and now - last_used > self.IDLE_TIMEOUT and not lock.locked():
+                self.logger.debug('Drop idle Clade object for "{0}"'.format(other_key[0]))
+                del self.__clades[other_key]
+
+    def __freeze(self, obj):
+        # Convert query arguments to hashable objects. Sets are sorted since their order does not matter.
+        if isinstance(obj, (set, frozenset)):
+            return 'set', tuple(sorted((self.__freeze(item) for item in obj), key=repr))
+        elif isinstance(obj, (list, tuple)):
+            return tuple(self.__freeze(item) for item in obj)
+        elif isinstance(obj, dict):
+            return 'dict', tuple(sorted(((key, self.__freeze(value)) for key, value in obj.items()), key=repr))
+
+        return obj
+
+
+def start_clade_service(logger, cache_size):
+    """
+    Start the Clade service and make processes forked later to send Clade queries to it.
+
+    :param logger: Logger object.
+    :param cache_size: Maximum total size of cached query results in bytes.
+    :return: Clade service process.
+    """
+    # Paths of Unix sockets are limited, so do not create it within the working directory.
+    address = os.path.join(tempfile.mkdtemp(prefix='klever-clade-'), 'clade.sock')
+    authkey = os.urandom(32)
+
+    logger.info('Start Clade service at "{0}"'.format(address))
+    service = CladeService(logger, address, authkey, cache_size)
+    service.start()
+    while not service.ready.wait(1):
+        if not service.is_alive():
+            raise RuntimeError('Clade service exited with code "{0}"'.format(service.exitcode))
+
+    CLADE_SERVICE.update({'address': address, 'authkey': authkey})
+
+    return service
+
+
+def stop_clade_service(logger, service):
+    logger.info('Stop Clade service')
+    CLADE_SERVICE.update({'address': None, 'authkey': None})
+    service.terminate()
+    service.join()
+    shutil.rmtree(os.path.dirname(service.address), ignore_errors=True)
@@ -15,9 +15,10 @@
 # limitations under the License.
 #
 
-import glob
+import contextlib
 import json
 import multiprocessing
+import multiprocessing.connection
 import os
 import shutil
 import signal
@@ -98,20 +99,231 @@ def remove_component_callbacks(logger, component):
             delattr(modl, attr)
 
 
+class ChildResources:
+    """
+    Resources consumed by finished children that are not separated from their parent. Children add their resources to
+    totals kept in shared memory, so the parent gets them without reading anything. Besides, totals are saved into the
+    single summary file that is rewritten in place, so they survive crashes of the parent.
+    """
+
+    def __init__(self, summary_file):
+        self.summary_file = os.path.abspath(summary_file)
+        # CPU time (in ms) is summed up while maximum memory size is the largest one. Besides, finished children are
+        # counted.
+        self.__totals = multiprocessing.Array('d', 3)
+
+        if os.path.isfile(self.summary_file):
+            with open(self.summary_file, encoding='utf8') as fp:
+                summary = json.load(fp)
+            self.__totals[:] = [summary['cpu_time'], summary['memory'], summary.get('children', 1)]
+
+    def add(self, resources):
+        with self.__totals.get_lock():
+            self.__totals[0] += resources['cpu_time']
+            self.__totals[1] = max(self.__totals[1], resources['memory'])
+            self.__totals[2] += 1
+            summary = json.dumps(dict(self.__get(), children=round(self.__totals[2]))).encode('utf8')
+
+            fd = os.open(self.summary_file, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, summary)
+                os.ftruncate(fd, len(summary))
+            finally:
+                os.close(fd)
+
+    def get(self):
+        """
+        Get resources consumed by finished children.
+
+        :return: Dictionary with resources or None if no child finished.
+        """
+        with self.__totals.get_lock():
+            return self.__get() if self.__totals[2] else None
+
+    def __get(self):
+        return {'cpu_time': round(self.__totals[0]), 'memory': round(self.__totals[1])}
+
+
+# Resources of finished children of the current process (or of the nearest ancestor separated from its parent).
+CHILD_RESOURCES = None
+
+
+def collect_child_resources():
+    """
+    Start collecting resources consumed by children that will be forked by the current process and that will not be
+    separated from it.
+    """
+    global CHILD_RESOURCES
+    CHILD_RESOURCES = ChildResources('child resources.json')
+
+
 def all_child_resources():
-    total_child_resources = {}
-    for child_resources_file in glob.glob(os.path.join('child resources', '*')):
-        with open(child_resources_file, encoding='utf8') as fp:
-            child_resources = json.load(fp)
-        total_child_resources[
-            os.path.splitext(os.path.basename(child_resources_file))[0]] = child_resources
-    return total_child_resources
+    return CHILD_RESOURCES.get() if CHILD_RESOURCES else None
 
 
-def count_consumed_resources(logger, start_time, include_child_resources=False, child_resources=None):
+class FairShareSlots:
+    """
+    Slots for processes shared by several owners, e.g. sub-jobs. Free slots are given to waiting owners having the
+    least number of occupied slots, so that owners with much work do not starve other ones and those with little work
+    finish early.
+    """
+    # Owners refresh their demands while they wait for slots. Demands of owners that were terminated expire.
+    DEMAND_TIMEOUT = 5
+
+    def __init__(self, number, owners):
+        self.number = number
+        self.__condition = multiprocessing.Condition()
+        self.__free = multiprocessing.RawValue('i', number)
+        self.__occupied = multiprocessing.RawArray('i', owners)
+        # Times when owners tried to get slots last time and did not succeed.
+        self.__demands = multiprocessing.RawArray('d', owners)
+
+    def acquire(self, owner, block=True, timeout=None):
+        """
+        Occupy a slot for the given owner.
+
+        :param owner: Owner number.
+        :param block: Whether to wait for a slot. Owners that do not block should try again at least once per
+                      DEMAND_TIMEOUT seconds, otherwise other owners will get slots even if they have more of them.
+        :param timeout: Maximum time to wait for a slot in seconds, None means infinite waiting.
+        :return: True if the slot was occupied and False otherwise.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self.__condition:
+            while True:
+                now = time.monotonic()
+                self.__demands[owner] = now
+                if self.__is_turn(owner):
+                    self.__demands[owner] = 0
+                    self.__free.value -= 1
+                    self.__occupied[owner] += 1
+                    return True
+                if not block or (deadline is not None and now >= deadline):
+                    return False
+                # Released slots wake waiting owners up immediately. Besides, demands should be refreshed before they
+                # expire while demands of other owners can expire meanwhile.
+                wait_time = self.DEMAND_TIMEOUT / 2
+                self.__condition.wait(min(wait_time, deadline - now) if deadline is not None else wait_time)
+
+    def release(self, owner, token=None):
+        """
+        Release a slot of the given owner.
+
+        :param owner: Owner number.
+        :param token: Shared value that is set when the slot is released. It is specified when both a process occupying
+                      the slot and its parent can release it, so the slot is released just once.
+        """
+        with self.__condition:
+            if token is not None:
+                if token.value:
+                    return
+                token.value = 1
+            # Slots could be reset already.
+            if self.__occupied[owner] > 0:
+                self.__free.value += 1
+                self.__occupied[owner] -= 1
+            self.__condition.notify_all()
+
+    def reset(self, owner):
+        """
+        Release all slots of the given owner, e.g. when its processes were terminated and could not release them.
+        """
+        with self.__condition:
+            self.__demands[owner] = 0
+            self.__free.value += self.__occupied[owner]
+            self.__occupied[owner] = 0
+            self.__condition.notify_all()
+
+    def __is_turn(self, owner):
+        if self.__free.value <= 0:
+            return False
+
+        now = time.monotonic()
+        return self.__occupied[owner] == min(self.__occupied[i] for i in range(len(self.__demands))
+                                             if now - self.__demands[i] < self.DEMAND_TIMEOUT)
+
+
+# Slots shared by all sub-jobs and the owner of slots occupied by the current process and its children.
+FAIR_SHARE_SLOTS = None
+FAIR_SHARE_SLOTS_OWNER = None
+
+
+def set_fair_share_slots(slots):
+    global FAIR_SHARE_SLOTS
+    FAIR_SHARE_SLOTS = slots
+
+
+def set_fair_share_slots_owner(owner):
+    global FAIR_SHARE_SLOTS_OWNER
+    FAIR_SHARE_SLOTS_OWNER = owner
+
+
+@contextlib.contextmanager
+def fair_share_slot():
+    """
+    Occupy a slot shared by all sub-jobs on behalf of the current sub-job while executing the block. Outside sub-jobs
+    nothing is occupied.
+    """
+    slots_owner = FAIR_SHARE_SLOTS_OWNER if FAIR_SHARE_SLOTS else None
+    if slots_owner is None:
+        yield
+        return
+
+    FAIR_SHARE_SLOTS.acquire(slots_owner)
+    try:
+        yield
+    finally:
+        FAIR_SHARE_SLOTS.release(slots_owner)
+
+
+def get_consumed_cpu_time(include_child_resources=False):
+    """
+    Get CPU time (in seconds) consumed by the process so far.
+
+    :param include_child_resources: Whether to take into account CPU time consumed by finished children.
+    :return: CPU time.
+    """
+    utime, stime = resource.getrusage(resource.RUSAGE_SELF)[0:2]
+    if include_child_resources:
+        utime_children, stime_children = resource.getrusage(resource.RUSAGE_CHILDREN)[0:2]
+        utime += utime_children
+        stime += stime_children
+
+    return utime + stime
+
+
+def reset_maximum_memory():
+    """
+    Reset the maximum memory size of the current process to its current memory size. This is required to count memory
+    consumed by components executed one by one within the same long-lived process.
+
+    :return: True if the maximum memory size was reset and False otherwise.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fp:
+            fp.write('5')
+    except OSError:
+        return False
+
+    return True
+
+
+def get_children_maximum_memory():
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+def count_consumed_resources(logger, start_time, include_child_resources=False, child_resources=None,
+                             start_cpu_time=0, start_children_memory=None, memory_measured=True):
     """
     Count resources (wall time, CPU time and maximum memory size) consumed by the process without its children.
     Note that launching under PyCharm gives its maximum memory size rather than the process one.
+    :param start_cpu_time: CPU time consumed by the process before the component started. It is not zero just for
+                           components executed one by one within the same long-lived process.
+    :param start_children_memory: Maximum memory size of children finished before the component started. Like
+                                  start_cpu_time, it is specified just for components executed within the long-lived
+                                  process. Children memory is taken into account just if some child exceeded it.
+    :param memory_measured: False if the maximum memory size of the process could not be reset when the component
+                            started within the long-lived process, so it is not measured at all.
     :return: resources.
     """
     logger.debug('Count consumed resources')
@@ -120,23 +332,26 @@ def count_consumed_resources(logger, start_time, include_child_resources=False,
         'Do not calculate resources of process with children and simultaneosly provide resources of children'
 
     utime, stime, maxrss = resource.getrusage(resource.RUSAGE_SELF)[0:3]
+    if not memory_measured:
+        maxrss = 0
 
     # Take into account children resources if necessary.
     if include_child_resources:
         utime_children, stime_children, maxrss_children = resource.getrusage(resource.RUSAGE_CHILDREN)[0:3]
         utime += utime_children
         stime += stime_children
-        maxrss = max(maxrss, maxrss_children)
+        # Maximum memory size of children can not be reset, so just the larger one belongs to the component children.
+        if start_children_memory is None or maxrss_children > start_children_memory:
+            maxrss = max(maxrss, maxrss_children)
     elif child_resources:
-        for child in child_resources:
-            # CPU time is sum of utime and stime, so add it just one time.
-            utime += child_resources[child]['cpu_time'] / 1000
-            maxrss = max(maxrss, child_resources[child]['memory'] / 1000)
-            # Wall time of children is included in wall time of their parent.
+        # CPU time is sum of utime and stime, so add it just one time.
+        utime += child_resources['cpu_time'] / 1000
+        maxrss = max(maxrss, child_resources['memory'] / 1000)
+        # Wall time of children is included in wall time of their parent.
 
     resources = {
         'wall_time': round(1000 * (time.time() - start_time)),
-        'cpu_time': round(1000 * (utime + stime)),
+        'cpu_time': round(1000 * (utime + stime - start_cpu_time)),
         'memory': 1000 * maxrss
     }
 
@@ -162,16 +377,15 @@ def launch_workers(logger, workers, monitoring_list=None):
             w.start()
 
         logger.info('Wait for components')
-        while True:
-            operating_subcomponents_num = 0
-
-            for p in workers:
-                p.join(1.0 / len(workers))
-                operating_subcomponents_num += p.is_alive()
+        operating_subcomponents = list(workers)
+        while operating_subcomponents:
+            # Sleep until some component exits, so that failures are noticed immediately without burning CPU.
+            wait_for_components(operating_subcomponents + alive_components(monitoring_list))
+
+            for p in [p for p in operating_subcomponents if not p.is_alive()]:
+                operating_subcomponents.remove(p)
+                p.join()
             check_components(logger, monitoring_list)
-
-            if not operating_subcomponents_num:
-                break
     finally:
         for p in workers:
             if p.is_alive():
@@ -179,7 +393,8 @@ def launch_workers(logger, workers, monitoring_list=None):
     logger.info('All components finished')
 
 
-def launch_queue_workers(logger, queue, constructor, number, fail_tolerant, monitoring_list=None):
+def launch_queue_workers(logger, queue, constructor, number, fail_tolerant, monitoring_list=None,
+                         persistent=False):
     """
     Blocking function that run given number of workers processing elements of particular queue.
 
@@ -190,9 +405,21 @@ def launch_queue_workers(logger, queue, constructor, number, fail_tolerant, moni
     :param fail_tolerant: True if no need to stop processing on fail.
     :param monitoring_list: List with already started Components that should be checked as other workers and if some of
                             them fails then we should also termionate the rest workers.
+    :param persistent: True if the given number of long-lived processes should run components for all elements one by
+                       one rather than a new process should be started for each element.
     :return: None
     """
+    if persistent:
+        __launch_persistent_queue_workers(logger, queue, constructor, number, fail_tolerant, monitoring_list)
+        return
+
     logger.info("Start children set with {!r} workers".format(number))
+    # Standard multiprocessing queues get elements through a pipe that can be waited for together with components.
+    queue_reader = getattr(queue, '_reader', None)
+    # Within sub-jobs workers also occupy slots shared by all sub-jobs.
+    slots_owner = FAIR_SHARE_SLOTS_OWNER if FAIR_SHARE_SLOTS else None
+    # The slot that was got while waiting and that was not occupied by a worker yet.
+    is_slot_reserved = False
     active = True
     elements = []
     components = []
@@ -204,59 +431,176 @@ def launch_queue_workers(logger, queue, constructor, number, fail_tolerant, moni
 
             # Then run new workers
             diff = number - len(components)
+            is_slot_awaited = False
             if len(components) < number and len(elements) > 0:
                 logger.debug("Going to start {} new workers".format(diff))
                 for _ in range(min(number - len(components), len(elements))):
+                    # Do not block here since finished workers should be processed meanwhile.
+                    if slots_owner is not None and not is_slot_reserved and \
+                            not FAIR_SHARE_SLOTS.acquire(slots_owner, block=False):
+                        is_slot_awaited = True
+                        break
+                    is_slot_reserved = False
                     element = elements.pop(0)
                     worker = constructor(element)
                     if isinstance(worker, Component):
+                        if slots_owner is not None:
+                            # Workers release slots as soon as they finish, so waiting for slots ends immediately.
+                            worker.fair_share_slot_token = multiprocessing.RawValue('b', 0)
                         components.append(worker)
                         worker.start()
                     else:
                         raise TypeError("Incorrect constructor, expect Component but get {}".
                                         format(type(worker).__name__))
 
-            # Wait for components termination
+            # Check that we can quit
+            if len(components) == 0 and len(elements) == 0 and not active:
+                break
+
+            # Sleep until either some component exits or a new element comes if there is room for a new worker. If
+            # the queue can not be waited for, check it periodically. If all slots are occupied, wait until workers of
+            # this or other sub-jobs release some slot unless some component has already exited. Other components are
+            # checked periodically meanwhile.
+            if is_slot_awaited:
+                if not wait_for_components(components + alive_components(monitoring_list), timeout=0):
+                    is_slot_reserved = FAIR_SHARE_SLOTS.acquire(slots_owner, timeout=1)
+            elif not elements or len(components) == number:
+                waitables = []
+                timeout = None
+                if active and len(components) < number:
+                    if queue_reader:
+                        waitables.append(queue_reader)
+                    else:
+                        timeout = 1
+                wait_for_components(components + alive_components(monitoring_list), waitables, timeout)
+
+            # Process terminated components
             finished = 0
-            # Becouse we use i for deletion we always delete the element near the end to not break order of
-            # following of the rest unprocessed elements
-            for i, p in reversed(list(enumerate(list(components)))):
+            for p in [p for p in components if not p.is_alive()]:
+                components.remove(p)
+                finished += 1
+                if slots_owner is not None:
+                    FAIR_SHARE_SLOTS.release(slots_owner, p.fair_share_slot_token)
                 try:
-                    p.join(1.0 / len(components))
+                    p.join()
                 except ComponentError:
                     # Ignore or terminate the rest
                     if not fail_tolerant:
                         raise
-                # If all is OK
-                if not p.is_alive():
-                    # Make to be sure to execute join the last time
-                    try:
-                        p.join()
-                    except ComponentError:
-                        # Ignore or terminate the rest
-                        if not fail_tolerant:
-                            raise
-
-                    # Just remove it
-                    components.pop(i)
-                    finished += 1
             # Check additional components, actually they should not terminate or finish during this funciton run so
             # just check that they are OK
             check_components(logger, monitoring_list)
 
             if finished > 0:
                 logger.debug("Finished {} workers".format(finished))
-
-            # Check that we can quit or must wait
-            if len(components) == 0 and len(elements) == 0:
-                if not active:
-                    break
-                else:
-                    time.sleep(1)
     finally:
         for p in components:
             if p.is_alive():
                 p.terminate()
+            if slots_owner is not None:
+                FAIR_SHARE_SLOTS.release(slots_owner, p.fair_share_slot_token)
+        if is_slot_reserved:
+            FAIR_SHARE_SLOTS.release(slots_owner)
+
+
+def __launch_persistent_queue_workers(logger, queue, constructor, number, fail_tolerant, monitoring_list):
+    logger.info("Start pool of {!r} persistent workers".format(number))
+    # Each worker reports exit codes of components it ran through its own pipe, so we can wait for all of them at once.
+    workers = {}
+
+    def start_worker():
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(target=__process_queue_elements, args=(queue, constructor, writer))
+        worker.start()
+        # Parent does not write anything, so closing its end lets us get EOF as soon as the worker exits.
+        writer.close()
+        workers[reader] = worker
+
+    try:
+        for _ in range(number):
+            start_worker()
+
+        while workers:
+            for ready in wait_for_components(alive_components(monitoring_list), list(workers)):
+                if ready not in workers:
+                    continue
+
+                try:
+                    name, exit_code, error = ready.recv()
+                except EOFError:
+                    worker = workers.pop(ready)
+                    worker.join()
+                    if worker.exitcode:
+                        logger.warning('Persistent worker "{0}" exitted with "{1}"'.format(worker.name,
+                                                                                          worker.exitcode))
+                        if not fail_tolerant:
+                            raise ComponentError('Persistent worker "{0}" failed'.format(worker.name))
+                        # Replace the failed worker to keep the number of simultaneously processed elements.
+                        start_worker()
+                    continue
+
+                if exit_code:
+                    if error:
+                        logger.warning('Cannot create component for queue element "{0}":\n{1}'.format(name, error))
+                    else:
+                        logger.warning('Component "{0}" exitted with "{1}"'.format(name, exit_code))
+                    if not fail_tolerant:
+                        raise ComponentError('Component "{0}" failed'.format(name))
+            check_components(logger, monitoring_list)
+    finally:
+        for worker in workers.values():
+            if worker.is_alive():
+                worker.terminate()
+    logger.info("All persistent workers finished")
+
+
+def __process_queue_elements(queue, constructor, connection):
+    while True:
+        # Block until a new element comes, so idle workers do not consume CPU.
+        element = queue.get()
+        if element is None:
+            # Let other workers know that no elements will come.
+            queue.put(None)
+            break
+
+        # Report failures of creating components like failures of components themselves rather than lose elements.
+        try:
+            component = constructor(element)
+            if not isinstance(component, Component):
+                raise TypeError("Incorrect constructor, expect Component but get {}".format(type(component).__name__))
+        except Exception:
+            connection.send((str(element)[:256], 1, traceback.format_exc()))
+            continue
+
+        # Within sub-jobs persistent workers also occupy slots shared by all sub-jobs while running components.
+        with fair_share_slot():
+            exit_code = component.run_in_current_process()
+        connection.send((component.name, exit_code, None))
+
+    connection.close()
+
+
+def wait_for_components(components, waitables=(), timeout=None):
+    """
+    Block until at least one of given components exits or one of given objects becomes ready. No CPU is consumed while
+    waiting since this relies upon process sentinels.
+
+    :param components: List with started Component objects.
+    :param waitables: Additional objects acceptable by multiprocessing.connection.wait().
+    :param timeout: Maximum time to wait in seconds, None means infinite waiting.
+    :return: List of ready process sentinels and objects.
+    """
+    return multiprocessing.connection.wait([c.sentinel for c in components] + list(waitables), timeout)
+
+
+def alive_components(components):
+    """
+    Get components that are still running.
+
+    :param components: List with started Component objects or None.
+    :return: List with Component objects.
+    """
+    return [c for c in components if c.is_alive()] if isinstance(components, list) else []
 
 
 def check_components(logger, components):
@@ -281,34 +625,59 @@ class ComponentError(ChildProcessError):
 
 
 class CallbacksCaller:
-    def __getattribute__(self, name):
-        attr = object.__getattribute__(self, name)
-        if callable(attr) and not attr.__name__.startswith('_'):
-            def callbacks_caller(*args, **kwargs):
-                ret = None
-
-                for kind in CALLBACK_KINDS:
-                    # Invoke callbacks if so.
-                    if kind in self.callbacks and name in self.callbacks[kind]:
-                        for component, callback in self.callbacks[kind][name]:
-                            self.logger.debug(
-                                'Invoke {0} callback of component "{1}" for "{2}"'.format(kind, component, name))
-                            ret = callback(self)
-                    # Invoke event itself.
-                    elif kind == 'instead':
-                        # Do not pass auxiliary objects created for subcomponents to methods that implement them and
-                        # that are actually component object methods.
-                        if args and type(args[0]).__name__.startswith('KleverSubcomponent'):
-                            ret = attr(*args[1:], **kwargs)
-                        else:
-                            ret = attr(*args, **kwargs)
-
-                # Return what event or instead/after callbacks returned.
-                return ret
-
-            return callbacks_caller
-        else:
-            return attr
+    """
+    Invoke callbacks registered for public methods. Methods are wrapped just once when callbacks are assigned, so
+    accessing attributes without callbacks costs nothing in addition.
+    """
+
+    @property
+    def callbacks(self):
+        return self.__callbacks
+
+    @callbacks.setter
+    def callbacks(self, callbacks):
+        # Forget wrappers bound for previously assigned callbacks.
+        for name in self.__dict__.pop('_CallbacksCaller__bound_events', ()):
+            del self.__dict__[name]
+
+        self.__callbacks = callbacks
+        self.__bound_events = []
+
+        for name in {name for kind in CALLBACK_KINDS if kind in callbacks for name in callbacks[kind]}:
+            try:
+                attr = getattr(self, name)
+            except AttributeError:
+                # Callbacks are collected for all components at once, so some of them may concern other components.
+                continue
+
+            if callable(attr) and not getattr(attr, '__name__', '_').startswith('_'):
+                self.__dict__[name] = self.__get_callbacks_caller(name, attr)
+                self.__bound_events.append(name)
+
+    def __get_callbacks_caller(self, name, attr):
+        def callbacks_caller(*args, **kwargs):
+            ret = None
+
+            for kind in CALLBACK_KINDS:
+                # Invoke callbacks if so.
+                if kind in self.callbacks and name in self.callbacks[kind]:
+                    for component, callback in self.callbacks[kind][name]:
+                        self.logger.debug(
+                            'Invoke {0} callback of component "{1}" for "{2}"'.format(kind, component, name))
+                        ret = callback(self)
+                # Invoke event itself.
+                elif kind == 'instead':
+                    # Do not pass auxiliary objects created for subcomponents to methods that implement them and
+                    # that are actually component object methods.
+                    if args and type(args[0]).__name__.startswith('KleverSubcomponent'):
+                        ret = attr(*args[1:], **kwargs)
+                    else:
+                        ret = attr(*args, **kwargs)
+
+            # Return what event or instead/after callbacks returned.
+            return ret
+
+        return callbacks_caller
 
 
 class Component(multiprocessing.Process, CallbacksCaller):
@@ -337,6 +706,14 @@ class Component(multiprocessing.Process, CallbacksCaller):
         # Component start time.
         self.tasks_start_time = 0
         self.__pid = None
+        # CPU time consumed by the current process before the component started. It is required to count resources
+        # correctly when the component is run within a long-lived process.
+        self.__start_cpu_time = 0
+        self.__start_children_memory = None
+        self.__memory_measured = True
+        self.__in_current_process = False
+        # Shared value of the slot shared by all sub-jobs that was occupied for the component by its parent.
+        self.fair_share_slot_token = None
 
         self.clean_dir = False
         self.excluded_clean = []
@@ -355,6 +732,47 @@ class Component(multiprocessing.Process, CallbacksCaller):
         self.logger.error('I forgot to define main function!')
         sys.exit(1)
 
+    def run_in_current_process(self):
+        """
+        Run the component within the current process rather than within a new one. This is intended for long-lived
+        workers that process many queue elements one by one.
+
+        :return: Exit code that the component would have if it was run within a separate process.
+        """
+        global CHILD_RESOURCES
+
+        self.__in_current_process = True
+        self.__start_cpu_time = get_consumed_cpu_time(self.include_child_resources)
+        self.__start_children_memory = get_children_maximum_memory()
+        # Otherwise the component would get the maximum memory size of all previously run components.
+        self.__memory_measured = reset_maximum_memory()
+        if not self.__memory_measured:
+            self.logger.warning('Memory consumed by component "{0}" is not measured'.format(self.name))
+        cwd = os.getcwd()
+        child_resources = CHILD_RESOURCES
+        parent_logger = self.logger
+        sigusr1_handler = signal.getsignal(signal.SIGUSR1)
+
+        try:
+            return self.run()
+        except SystemExit as e:
+            # Some functions like klever.core.utils.execute() exit on failures. Treat this like multiprocessing does.
+            if e.code is None:
+                return os.EX_OK
+            return e.code if isinstance(e.code, int) else 1
+        finally:
+            signal.signal(signal.SIGUSR1, sigusr1_handler)
+            os.chdir(cwd)
+            CHILD_RESOURCES = child_resources
+
+            # Component specific logger is got each time with the same name, so remove its handlers to avoid logging to
+            # files of previously run components.
+            if self.logger is not parent_logger:
+                for handler in list(self.logger.handlers):
+                    self.logger.removeHandler(handler)
+                    handler.close()
+                self.logger = parent_logger
+
     def run(self):
         # Remember approximate time of start to count wall time.
         self.tasks_start_time = time.time()
@@ -378,9 +796,8 @@ class Component(multiprocessing.Process, CallbacksCaller):
             # Get component specific logger.
             self.logger = klever.core.utils.get_logger(self.name, self.conf['logging'])
             if self.separate_from_parent:
-                # Create special directory where child resources of processes separated from parents will be printed.
-                self.logger.info('Create child resources directory "child resources"')
-                os.makedirs('child resources'.encode('utf8'))
+                # Children that are not separated from this component will add their resources here.
+                collect_child_resources()
 
                 report = {
                     'identifier': self.id,
@@ -409,7 +826,11 @@ class Component(multiprocessing.Process, CallbacksCaller):
                     fp.write('\n')
                 fp.write(exception_info)
         finally:
-            self.__finalize(exception=exception)
+            if self.fair_share_slot_token is not None:
+                FAIR_SHARE_SLOTS.release(FAIR_SHARE_SLOTS_OWNER, self.fair_share_slot_token)
+            exit_code = self.__finalize(exception=exception)
+
+        return exit_code
 
     def __finalize(self, exception=False, stopped=False):
         # Like in Core at least print information about unexpected exceptions in code below and properly exit.
@@ -427,10 +848,12 @@ class Component(multiprocessing.Process, CallbacksCaller):
                                       self.vals['report id'],
                                       self.conf['main working directory'])
 
-                child_resources = all_child_resources()
+                # Resources of children are already included if they are counted by the operating system.
+                child_resources = None if self.include_child_resources else all_child_resources()
                 report = {'identifier': self.id}
                 report.update(count_consumed_resources(self.logger, self.tasks_start_time, self.include_child_resources,
-                                                       child_resources))
+                                                       child_resources, self.__start_cpu_time,
+                                                       self.__start_children_memory, self.__memory_measured))
                 # todo: this is embarassing
                 if self.coverage:
                     report['coverage'] = self.coverage
@@ -441,10 +864,11 @@ class Component(multiprocessing.Process, CallbacksCaller):
                 klever.core.utils.report(self.logger, 'finish', report, self.mqs['report files'], self.vals['report id'],
                                   self.conf['main working directory'])
             else:
-                with open(os.path.join('child resources', self.name + '.json'), 'w', encoding='utf8') as fp:
-                    klever.core.utils.json_dump(count_consumed_resources(self.logger, self.tasks_start_time,
-                                                                  self.include_child_resources),
-                                         fp, self.conf['keep intermediate files'])
+                CHILD_RESOURCES.add(count_consumed_resources(self.logger, self.tasks_start_time,
+                                                             self.include_child_resources,
+                                                             start_cpu_time=self.__start_cpu_time,
+                                                             start_children_memory=self.__start_children_memory,
+                                                             memory_measured=self.__memory_measured))
         except Exception:
             exception = True
             self.logger.exception('Catch exception')
@@ -463,10 +887,15 @@ class Component(multiprocessing.Process, CallbacksCaller):
                 # Treat component stopping as normal termination.
                 exit_code = os.EX_SOFTWARE if exception else os.EX_OK
                 self.logger.info('Exit with code "{0}"'.format(exit_code))
+                # Long-lived process should proceed to following components unless it was stopped.
+                if self.__in_current_process and not stopped:
+                    return exit_code
                 # Do not perform any pre-exit operations like waiting for reading filled queues since this can lead to
                 # deadlocks.
                 os._exit(exit_code)
 
+        return os.EX_OK
+
     def __get_subcomponent_name(self):
         return '' if self.separate_from_parent else '[{0}] '.format(self.name)
 
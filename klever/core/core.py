@@ -22,10 +22,12 @@ import multiprocessing
 import os
 import pkg_resources
 import shutil
+import threading
 import time
 import traceback
 import queue
 
+import klever.core.clade
 import klever.core.job
 import klever.core.session
 import klever.core.utils
@@ -45,8 +47,9 @@ class Core(klever.core.components.CallbacksCaller):
         self.logger = None
         self.comp = []
         self.session = None
+        self.clade_service = None
         self.mqs = {}
-        self.report_id = multiprocessing.Value('i', 1)
+        self.report_id = klever.core.utils.ReportIdentifiers()
         self.uploading_reports_process = None
         self.uploading_reports_process_exitcode = multiprocessing.Value('i', 0)
         self.callbacks = {}
@@ -65,12 +68,22 @@ class Core(klever.core.components.CallbacksCaller):
             self.logger = klever.core.utils.get_logger(type(self).__name__, self.conf['logging'])
             self.logger.info('Solve job "{0}"'.format(self.conf['identifier']))
 
+            # Components will inherit these settings.
+            klever.core.utils.set_reports_writing_settings(self.conf.get('asynchronous reports writing', False),
+                                                           self.conf.get('reports fsync', 'file'),
+                                                           self.conf['keep intermediate files'])
+            if self.conf.get('file checksums index'):
+                klever.core.utils.set_file_checksums_index(os.path.realpath('file checksums.txt'))
+            if self.conf.get('Clade service', True):
+                self.clade_service = klever.core.clade.start_clade_service(
+                    self.logger, self.conf.get('Clade cache size', 512) * 1024 * 1024)
+
             self.session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'])
             self.session.start_job_decision(klever.core.job.JOB_FORMAT, klever.core.job.JOB_ARCHIVE)
 
             self.mqs['report files'] = multiprocessing.Manager().Queue()
 
-            os.makedirs('child resources'.encode('utf8'))
+            klever.core.components.collect_child_resources()
 
             self.uploading_reports_process = Reporter(self.conf, self.logger, self.ID, self.callbacks, self.mqs,
                                                       {'report id': self.report_id}, session=self.session)
@@ -96,10 +109,7 @@ class Core(klever.core.components.CallbacksCaller):
             )
             self.is_start_report_uploaded = True
 
-            klever.core.job.start_jobs(self, {
-                'report id': self.report_id,
-                'coverage_finished': multiprocessing.Manager().dict()
-            })
+            klever.core.job.start_jobs(self, {'report id': self.report_id})
         except Exception:
             self.process_exception()
 
@@ -174,6 +184,9 @@ class Core(klever.core.components.CallbacksCaller):
                     self.uploading_reports_process.terminate()
             # At least release working directory even if cleaning code above raised some exceptions.
             finally:
+                if self.clade_service:
+                    klever.core.clade.stop_clade_service(self.logger, self.clade_service)
+
                 if self.is_solving_file_fp and not self.is_solving_file_fp.closed:
                     if self.logger:
                         self.logger.info('Release working directory')
@@ -279,66 +292,127 @@ class Core(klever.core.components.CallbacksCaller):
 
 
 class Reporter(klever.core.components.Component):
+    # Upper bound for the number of reports uploaded at once.
+    MAX_BATCH_LENGTH = 1000
 
     def __init__(self, conf, logger, parent_id, callbacks, mqs, vals, id=None, work_dir=None, attrs=None,
                  separate_from_parent=False, include_child_resources=False, session=None):
         super(Reporter, self).__init__(conf, logger, parent_id, callbacks, mqs, vals, id, work_dir, attrs,
                                        separate_from_parent, include_child_resources)
         self.session = session
+        self.writer_traceback = None
 
     def send_reports(self):
-        issleep = True
-        while True:
-            # Report batches of reports each 3 seconds. This reduces the number of requests quite considerably.
-            if issleep:
-                time.sleep(3)
-            else:
-                issleep = True
-
-            reports_and_report_file_archives = []
-            is_finish = False
-            while True:
-                try:
-                    # TODO: replace MQ with "reports and report file archives".
-                    report_and_report_file_archives = self.mqs['report files'].get_nowait()
+        # Reports can be queued without writing them. In that case write them in background and upload written ones.
+        if klever.core.utils.REPORTS_WRITING_SETTINGS['asynchronous']:
+            reports_queue = queue.Queue()
+            writer = threading.Thread(target=self.__write_reports, args=(reports_queue,))
+            writer.start()
+        else:
+            reports_queue = self.mqs['report files']
+            writer = None
+
+        # Upload reports in batches. A batch is uploaded as soon as it becomes large enough or its first report waits
+        # for too long. The maximum number of reports in a batch grows while batches are uploaded fast enough and it
+        # shrinks otherwise.
+        latency = self.conf.get('reports uploading latency', 1)
+        max_batch_size = self.conf.get('reports batch size', 64 * 1024 * 1024)
+        max_batch_length = 10
+
+        batch = []
+        batch_size = 0
+        batch_deadline = None
+        is_finish = False
+        while not is_finish:
+            try:
+                # TODO: replace MQ with "reports and report file archives".
+                report_and_report_file_archives = reports_queue.get(
+                    timeout=max(batch_deadline - time.time(), 0) if batch_deadline else None)
+
+                if report_and_report_file_archives is None:
+                    self.logger.debug('Report files message queue was terminated')
+                    is_finish = True
+                else:
+                    batch.append(report_and_report_file_archives)
+                    batch_size += sum(os.path.getsize(archive) for archive in
+                                      report_and_report_file_archives.get('report file archives') or [])
+                    if not batch_deadline:
+                        batch_deadline = time.time() + latency
+            except queue.Empty:
+                pass
+
+            if batch and (is_finish or len(batch) >= max_batch_length or batch_size >= max_batch_size or
+                          time.time() >= batch_deadline):
+                start_time = time.time()
+                self.__upload_reports(batch)
+                if time.time() - start_time < latency:
+                    max_batch_length = min(max_batch_length * 2, self.MAX_BATCH_LENGTH)
+                else:
+                    max_batch_length = max(max_batch_length // 2, 1)
+
+                batch = []
+                batch_size = 0
+                batch_deadline = None
+
+        if writer:
+            writer.join()
+            if self.writer_traceback:
+                raise RuntimeError('Reports writer thread failed with the following traceback:\n{0}'
+                                   .format(self.writer_traceback))
+
+    main = send_reports
 
-                    if report_and_report_file_archives is None:
-                        self.logger.debug('Report files message queue was terminated')
-                        is_finish = True
+    def __upload_reports(self, reports_and_report_file_archives):
+        for report_and_report_file_archives in reports_and_report_file_archives:
+            report_file_archives = report_and_report_file_archives.get('report file archives')
+            self.logger.debug('Upload report file "{0}"{1}'.format(
+                report_and_report_file_archives['report file'],
+                ' with report file archives:\n{0}'
+                .format('\n'.join(['  {0}'.format(archive) for archive in report_file_archives]))
+                if report_file_archives else ''))
+
+        self.session.upload_reports_and_report_file_archives(reports_and_report_file_archives)
+
+        # Remove reports and report file archives if needed.
+        if not self.conf['keep intermediate files']:
+            for report_and_report_file_archives in reports_and_report_file_archives:
+                os.remove(report_and_report_file_archives['report file'])
+                report_file_archives = report_and_report_file_archives.get('report file archives')
+                if report_file_archives:
+                    for archive in report_file_archives:
+                        os.remove(archive)
+
+    def __write_reports(self, written_reports):
+        fsync = klever.core.utils.REPORTS_WRITING_SETTINGS['fsync']
+        try:
+            is_finish = False
+            while not is_finish:
+                # Wait for some report and write it together with all other pending ones.
+                pending_reports = [self.mqs['report files'].get()]
+                while pending_reports[-1] is not None:
+                    try:
+                        pending_reports.append(self.mqs['report files'].get_nowait())
+                    except queue.Empty:
                         break
 
-                    reports_and_report_file_archives.append(report_and_report_file_archives)
+                if pending_reports[-1] is None:
+                    self.logger.debug('Report files message queue was terminated')
+                    pending_reports.pop()
+                    is_finish = True
 
-                    # Do not send more than 10 reports at once. Otherwise different strange issues may appear im Core
-                    # and Bridge.
-                    if len(reports_and_report_file_archives) == 10:
-                        # Do not sleep since there may be pending reports already.
-                        issleep = False
-                        break
-                except queue.Empty:
-                    break
-
-            if reports_and_report_file_archives:
-                for report_and_report_file_archives in reports_and_report_file_archives:
-                    report_file_archives = report_and_report_file_archives.get('report file archives')
-                    self.logger.debug('Upload report file "{0}"{1}'.format(
-                        report_and_report_file_archives['report file'],
-                        ' with report file archives:\n{0}'
-                        .format('\n'.join(['  {0}'.format(archive) for archive in report_file_archives]))
-                        if report_file_archives else ''))
-
-                self.session.upload_reports_and_report_file_archives(reports_and_report_file_archives)
-
-                # Remove reports and report file archives if needed.
-                if not self.conf['keep intermediate files']:
-                    for report_and_report_file_archives in reports_and_report_file_archives:
-                        os.remove(report_and_report_file_archives['report file'])
-                        report_file_archives = report_and_report_file_archives.get('report file archives')
-                        if report_file_archives:
-                            for archive in report_file_archives:
-                                os.remove(archive)
-
-            if is_finish:
-                break
+                batch = []
+                for pending_report in pending_reports:
+                    if 'pending report' in pending_report:
+                        pending_report = klever.core.utils.write_report(self.logger, pending_report['pending report'],
+                                                                        fsync == 'file')
+                    batch.append(pending_report)
 
-    main = send_reports
+                if fsync == 'batch':
+                    klever.core.utils.fsync_report_files(batch)
+
+                for report_and_report_file_archives in batch:
+                    written_reports.put(report_and_report_file_archives)
+        except Exception:
+            self.writer_traceback = traceback.format_exc().rstrip()
+        finally:
+            written_reports.put(None)
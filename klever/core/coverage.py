@@ -159,7 +159,7 @@ class JCR(klever.core.components.Component):
 
                     if os.path.isfile(coverage_info['coverage info file']):
                         with open(coverage_info['coverage info file'], encoding='utf8') as fp:
-                            loaded_coverage_info = json.load(fp)
+                            loaded_coverage_info = klever.core.utils.json_load(fp)
 
                         # Clean if needed
                         if not self.conf['keep intermediate files']:
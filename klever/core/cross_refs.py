@@ -15,7 +15,9 @@
 # limitations under the License.
 #
 
+import hashlib
 import os
+import shutil
 
 import klever.core.utils
 from klever.core.highlight import Highlight
@@ -24,7 +26,7 @@ from klever.core.highlight import Highlight
 class CrossRefs:
     INDEX_DATA_FORMAT_VERSION = 1
 
-    def __init__(self, conf, logger, clade, file_name, new_file_name, common_dirs, common_prefix=''):
+    def __init__(self, conf, logger, clade, file_name, new_file_name, common_dirs, common_prefix='', cache_dir=None):
         self.conf = conf
         self.logger = logger
         self.clade = clade
@@ -32,8 +34,44 @@ class CrossRefs:
         self.new_file_name = new_file_name
         self.common_dirs = common_dirs
         self.common_prefix = common_prefix
+        # Directory where cross references are cached between runs on the same Clade base.
+        self.cache_dir = cache_dir
 
     def get_cross_refs(self):
+        cache_file = self.__get_cache_file() if self.cache_dir else None
+        cross_refs_file = self.new_file_name + '.idx.json'
+
+        if cache_file and os.path.isfile(cache_file):
+            shutil.copyfile(cache_file, cross_refs_file)
+            return
+
+        self.__get_cross_refs(cross_refs_file)
+
+        if cache_file and os.path.isfile(cross_refs_file):
+            # Other jobs can use the cache simultaneously, so cached files should appear atomically. Do not fail if the
+            # cache is not writable.
+            try:
+                os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                tmp_cache_file = '{0}.{1}'.format(cache_file, os.getpid())
+                shutil.copyfile(cross_refs_file, tmp_cache_file)
+                os.replace(tmp_cache_file, cache_file)
+            except OSError as e:
+                self.logger.debug('Could not cache cross references for "{0}": {1}'.format(self.file_name, e))
+
+    def __get_cache_file(self):
+        # Cross references depend on the source file content, its name and the way to shorten referred source file names
+        # as well as on the Clade base and the format of index data.
+        key = hashlib.sha1()
+        for item in (klever.core.utils.get_file_checksum(self.clade.get_storage_path(self.file_name)), self.file_name,
+                     self.common_prefix, self.conf['keep intermediate files'], *self.common_dirs):
+            key.update(str(item).encode('utf8'))
+            key.update(b'\0')
+        key = key.hexdigest()
+
+        return os.path.join(self.cache_dir, self.clade.get_uuid(), str(self.INDEX_DATA_FORMAT_VERSION), key[:2],
+                            key + '.idx.json')
+
+    def __get_cross_refs(self, cross_refs_file):
         with open(self.new_file_name) as fp:
             try:
                 src = fp.read()
@@ -84,31 +122,30 @@ class CrossRefs:
         refs_to_func_defs = []
         refs_to_func_decls = []
         refs_to_macro_defs = []
+        # Locations of references to macro definitions and function definitions to check for references at the same
+        # places in constant time.
+        macro_def_locs = set()
+        func_def_locs = set()
         for ref_to_kind in ('def_macro', 'def_func', 'decl_func'):
             refs_to = refs_to_func_defs if ref_to_kind == 'def_func' else refs_to_func_decls \
                 if ref_to_kind == 'decl_func' else refs_to_macro_defs
             for raw_ref_to in raw_refs_to[ref_to_kind]:
+                loc = tuple(raw_ref_to[0])
+
                 # Do not add references to function definitions/declarations if there are already references to macro
                 # definitions at the same places.
-                if ref_to_kind != 'def_macro':
-                    is_exist = False
-                    for ref_to_macro_def in refs_to_macro_defs:
-                        if ref_to_macro_def[0] == raw_ref_to[0]:
-                            is_exist = True
-                            break
-                    if is_exist:
-                        continue
+                if ref_to_kind != 'def_macro' and loc in macro_def_locs:
+                    continue
 
                 # Do not add references to function declarations if there are already references to function definitions
                 # at the same places.
-                if ref_to_kind == 'decl_func':
-                    is_exist = False
-                    for ref_to_func_def in refs_to_func_defs:
-                        if ref_to_func_def[0] == raw_ref_to[0]:
-                            is_exist = True
-                            break
-                    if is_exist:
-                        continue
+                if ref_to_kind == 'decl_func' and loc in func_def_locs:
+                    continue
+
+                if ref_to_kind == 'def_macro':
+                    macro_def_locs.add(loc)
+                elif ref_to_kind == 'def_func':
+                    func_def_locs.add(loc)
 
                 # TODO: will it work if there will be multiple declarations of the same entity in the same source file?
                 refs_to.append([
@@ -191,5 +228,5 @@ class CrossRefs:
             'highlight': highlight.highlights
         }
 
-        with open(os.path.join(self.new_file_name + '.idx.json'), 'w') as fp:
+        with open(cross_refs_file, 'w') as fp:
             klever.core.utils.json_dump(cross_ref, fp, self.conf['keep intermediate files'])
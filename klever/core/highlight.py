@@ -15,6 +15,8 @@
 # limitations under the License.
 #
 
+import bisect
+import itertools
 import re
 from pygments import lex
 from pygments.lexers import CLexer
@@ -197,38 +199,58 @@ class Highlight:
         # Store highlights to be removed and remove them later at once rather than create new list of highlights each
         # time when some highlights should be removed. This should work much faster since we expect that there are very
         # many highlights and just few highlights should be removed
-        highlights_to_be_removed = list()
+        highlights_to_be_removed = set()
         # Sometimes rather than to remove highlights completely we will remain some parts of them. For instance, this
         # is vital for macro definitions each of which corresponds to the only highlights list element and which can
         # include macro expansion reference from in the middle.
         highlights_to_be_added = list()
+
+        # Index highlights by line numbers and start offsets to find overlapped highlights in logarithmic time rather
+        # than to compare each extra highlight with all highlights. Maximum end offsets of highlights starting before
+        # each highlight allow to skip highlights ending before extra highlights even if some highlights overlap.
+        lines = dict()
+        for i, highlight in enumerate(self.highlights):
+            lines.setdefault(highlight[1], list()).append((highlight[2], i))
+        index = dict()
+        for line_numb, line_highlights in lines.items():
+            line_highlights.sort()
+            starts = [start_offset for start_offset, _ in line_highlights]
+            max_ends = list(itertools.accumulate((self.highlights[i][3] for _, i in line_highlights), max))
+            index[line_numb] = (starts, max_ends, [i for _, i in line_highlights])
+
         for extra_highlight in extra_highlights:
             extra_highlight_line_numb, extra_highlight_start_offset, extra_highlight_end_offset = extra_highlight[1:]
 
-            for highlight in self.highlights:
+            if extra_highlight_line_numb not in index:
+                continue
+
+            starts, max_ends, line_highlights = index[extra_highlight_line_numb]
+            # Keep the original order of highlights to get the same result as for comparing with all of them.
+            for i in sorted(line_highlights[bisect.bisect_left(max_ends, extra_highlight_start_offset):
+                                            bisect.bisect_right(starts, extra_highlight_end_offset)]):
+                highlight = self.highlights[i]
                 highlight_kind, highlight_line_numb, highlight_start_offset, highlight_end_offset = highlight
-                if highlight_line_numb == extra_highlight_line_numb:
-                    if highlight_start_offset <= extra_highlight_end_offset \
-                            and highlight_end_offset >= extra_highlight_start_offset:
-                        highlights_to_be_removed.append(highlight)
-                        if highlight_kind == 'CP':
-                            if highlight_start_offset < extra_highlight_start_offset:
-                                highlights_to_be_added.append([
-                                    'CP',
-                                    highlight_line_numb,
-                                    highlight_start_offset,
-                                    extra_highlight_start_offset
-                                ])
-                            if extra_highlight_end_offset < highlight_end_offset:
-                                highlights_to_be_added.append([
-                                    'CP',
-                                    highlight_line_numb,
-                                    extra_highlight_end_offset,
-                                    highlight_end_offset
-                                ])
+                if highlight_end_offset >= extra_highlight_start_offset:
+                    highlights_to_be_removed.add(i)
+                    if highlight_kind == 'CP':
+                        if highlight_start_offset < extra_highlight_start_offset:
+                            highlights_to_be_added.append([
+                                'CP',
+                                highlight_line_numb,
+                                highlight_start_offset,
+                                extra_highlight_start_offset
+                            ])
+                        if extra_highlight_end_offset < highlight_end_offset:
+                            highlights_to_be_added.append([
+                                'CP',
+                                highlight_line_numb,
+                                extra_highlight_end_offset,
+                                highlight_end_offset
+                            ])
 
         if highlights_to_be_removed:
-            self.highlights = [highlight for highlight in self.highlights if highlight not in highlights_to_be_removed]
+            self.highlights = [highlight for i, highlight in enumerate(self.highlights)
+                               if i not in highlights_to_be_removed]
 
         # Add extra highlights.
         for extra_highlight in extra_highlights:
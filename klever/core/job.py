@@ -25,11 +25,10 @@ import tarfile
 import time
 import zipfile
 
-from clade import Clade
-
 import klever.core.utils
 import klever.core.session
 import klever.core.components
+from klever.core.clade import Clade
 from klever.core.cross_refs import CrossRefs
 from klever.core.progress import PW
 from klever.core.coverage import JCR
@@ -47,6 +46,43 @@ CODE_COVERAGE_DETAILS_MAP = {
     '1': 'C source files including models',
     '2': 'All source files'
 }
+# Functions of that many source files are requested from Clade at once.
+FUNCTIONS_BATCH_SIZE = 1000
+
+
+def get_original_sources_basic_info(clade, working_src_trees, batch_size=FUNCTIONS_BATCH_SIZE):
+    """
+    Get the total number of lines and lines where functions are defined for each source file. Functions are requested
+    from Clade for batches of source files rather than for each source file separately, so the Clade function index is
+    passed just once while memory consumption is bounded by the batch size.
+
+    :param clade: Clade object.
+    :param working_src_trees: Working source trees to be cut off from source file names.
+    :param batch_size: The number of source files to get functions for at once.
+    :return: Dictionary with source file names as keys and lists with the number of lines and sorted function
+             definition lines as values.
+    """
+    src_info = clade.src_info
+
+    # Skip non-source files.
+    src_file_names = dict()
+    for file_name in src_info:
+        src_file_name = klever.core.utils.make_relative_path(working_src_trees, file_name)
+        if src_file_name != file_name:
+            src_file_names[file_name] = os.path.join('source files', src_file_name)
+
+    src_files_info = dict()
+    file_names = list(src_file_names)
+    for i in range(0, len(file_names), batch_size):
+        batch = file_names[i:i + batch_size]
+        funcs = clade.get_functions_by_file(batch, False) or dict()
+        for file_name in batch:
+            src_files_info[src_file_names[file_name]] = [
+                src_info[file_name]['loc'],
+                sorted(int(func_info['line']) for func_info in funcs.get(file_name, dict()).values())
+            ]
+
+    return src_files_info
 
 
 def start_jobs(core_obj, vals):
@@ -90,6 +126,8 @@ def start_jobs(core_obj, vals):
     common_components_conf['code coverage details'] = CODE_COVERAGE_DETAILS_MAP[
         common_components_conf['code coverage details']]
 
+    vals['coverage_finished'] = klever.core.utils.SharedDict(len(common_components_conf.get('sub-jobs', ())) or 1)
+
     subcomponents = []
     try:
         queues_to_terminate = []
@@ -150,21 +188,26 @@ def start_jobs(core_obj, vals):
                 components_common_conf=common_components_conf)
             klever.core.components.launch_workers(core_obj.logger, [job], subcomponents + [core_obj.uploading_reports_process])
             core_obj.logger.info("Finished main job")
+
+        # Stop queues
+        for queue in queues_to_terminate:
+            core_obj.logger.info('Terminate queue {!r}'.format(queue))
+            core_obj.mqs[queue].put(None)
+        # Stop subcomponents
+        core_obj.logger.info('Jobs are solved, waiting for subcomponents')
+        for subcomponent in subcomponents:
+            subcomponent.join()
+        core_obj.logger.info('Jobs and arranging results reporter finished')
     except Exception:
         for p in subcomponents:
             if p.is_alive():
                 p.terminate()
         raise
-
-    # Stop queues
-    for queue in queues_to_terminate:
-        core_obj.logger.info('Terminate queue {!r}'.format(queue))
-        core_obj.mqs[queue].put(None)
-    # Stop subcomponents
-    core_obj.logger.info('Jobs are solved, waiting for subcomponents')
-    for subcomponent in subcomponents:
-        subcomponent.join()
-    core_obj.logger.info('Jobs and arranging results reporter finished')
+    finally:
+        # Shared memory segments outlive processes, so they should be removed even if something failed.
+        vals['coverage_finished'].unlink()
+        if 'subjobs progress' in vals:
+            vals['subjobs progress'].unlink()
 
 
 def __get_common_components_conf(logger, conf):
@@ -228,6 +271,15 @@ def __solve_sub_jobs(core_obj, vals, components_common_conf, subcomponents):
                                                               'Sub-jobs processing')
     core_obj.logger.debug('Sub-jobs will be decided in parallel by "{0}" solvers'.format(sub_job_solvers_num))
 
+    # Sub-jobs share slots for generating program fragments descriptions and verification tasks and for processing
+    # results rather than each of them starts as many workers as they would be started for the only job. So several
+    # huge sub-jobs can not starve small ones.
+    slots = klever.core.components.FairShareSlots(
+        klever.core.utils.get_parallel_threads_num(core_obj.logger, components_common_conf, 'Tasks generation'),
+        len(components_common_conf['sub-jobs']))
+    core_obj.logger.debug('Sub-jobs will share "{0}" slots for their workers'.format(slots.number))
+    klever.core.components.set_fair_share_slots(slots)
+
     subjob_queue = multiprocessing.Queue()
     # Initialize queue first
     core_obj.logger.debug('Initialize workqueue with sub-job identifiers')
@@ -631,6 +683,7 @@ class Job(klever.core.components.Component):
             file_name = self.mqs['file names'].get()
 
             if not file_name:
+                self.mqs['processed source files'].put(None)
                 return
 
             src_file_name = klever.core.utils.make_relative_path(self.common_components_conf['working source trees'],
@@ -645,37 +698,37 @@ class Job(klever.core.components.Component):
 
             cross_refs = CrossRefs(self.common_components_conf, self.logger, self.clade,
                                    file_name, new_file_name,
-                                   self.common_components_conf['working source trees'], 'source files')
+                                   self.common_components_conf['working source trees'], 'source files',
+                                   self.cross_refs_cache_dir)
             cross_refs.get_cross_refs()
 
-    def __get_original_sources_basic_info(self):
-        self.logger.info('Get information on original sources for following visualization of uncovered source files')
-
-        # For each source file we need to know the total number of lines and places where functions are defined.
-        src_files_info = dict()
-        for file_name, file_size in self.clade.src_info.items():
-            src_file_name = klever.core.utils.make_relative_path(self.common_components_conf['working source trees'], file_name)
-
-            # Skip non-source files.
-            if src_file_name == file_name:
-                continue
+            self.mqs['processed source files'].put(new_file_name)
 
-            src_file_name = os.path.join('source files', src_file_name)
+    def __archive_source_files(self):
+        # Add source files and their cross references to the archive as soon as workers process them rather than
+        # after all of them will finish.
+        finished_workers = 0
+        with open('original sources.zip', mode='w+b', buffering=0) as f:
+            with zipfile.ZipFile(f, mode='w', compression=zipfile.ZIP_DEFLATED) as zfp:
+                while finished_workers < self.workers_num:
+                    new_file_name = self.mqs['processed source files'].get()
 
-            src_files_info[src_file_name] = list()
+                    if not new_file_name:
+                        finished_workers += 1
+                        continue
 
-            # Store source file size.
-            src_files_info[src_file_name].append(file_size['loc'])
+                    for file in (new_file_name, new_file_name + '.idx.json'):
+                        # Cross references are absent for source files with non UTF-8 encoding.
+                        if os.path.isfile(file):
+                            zfp.write(file, arcname=klever.core.utils.make_relative_path(['original sources'], file))
 
-            # Store source file function definition lines.
-            func_def_lines = list()
-            funcs = self.clade.get_functions_by_file([file_name], False)
+                os.fsync(zfp.fp)
 
-            if funcs:
-                for func_name, func_info in list(funcs.values())[0].items():
-                    func_def_lines.append(int(func_info['line']))
+    def __get_original_sources_basic_info(self):
+        self.logger.info('Get information on original sources for following visualization of uncovered source files')
 
-            src_files_info[src_file_name].append(sorted(func_def_lines))
+        # For each source file we need to know the total number of lines and places where functions are defined.
+        src_files_info = get_original_sources_basic_info(self.clade, self.common_components_conf['working source trees'])
 
         # Dump obtain information (huge data!) to load it when reporting total code coverage if everything will be okay.
         with open('original sources basic information.json', 'w') as fp:
@@ -696,15 +749,18 @@ class Job(klever.core.components.Component):
             'Cut off working source trees or build directory from original source file names and convert index data')
         os.makedirs('original sources')
         self.mqs['file names'] = multiprocessing.Queue()
+        self.mqs['processed source files'] = multiprocessing.Queue()
         self.workers_num = klever.core.utils.get_parallel_threads_num(self.logger, self.conf)
-        subcomponents = [('PSFS', self.__process_source_files)]
+        # Cross references are cached, so they are reused when deciding jobs on the same build base once again.
+        self.cross_refs_cache_dir = klever.core.utils.get_cache_dir(self.common_components_conf,
+                                                                    'cross references cache directory',
+                                                                    'cross references')
+        subcomponents = [('PSFS', self.__process_source_files), ('ASF', self.__archive_source_files)]
         for i in range(self.workers_num):
             subcomponents.append(('RSF', self.__process_source_file))
         self.launch_subcomponents(False, *subcomponents)
         self.mqs['file names'].close()
-
-        self.logger.info('Compress original sources')
-        klever.core.utils.ArchiveFiles(['original sources']).make_archive('original sources.zip')
+        self.mqs['processed source files'].close()
 
         self.logger.info('Upload original sources')
         try:
@@ -745,11 +801,18 @@ class Job(klever.core.components.Component):
 class SubJob(Job):
 
     def decide_sub_job(self):
+        # Workers of sub-job components will occupy slots shared by all sub-jobs on behalf of this sub-job.
+        owner = int(os.path.basename(self.id))
+        klever.core.components.set_fair_share_slots_owner(owner)
         try:
             self.decide_job_or_sub_job()
             self.vals['subjobs progress'][self.id] = 'finished'
         except Exception:
             self.vals['subjobs progress'][self.id] = 'failed'
             raise
+        finally:
+            # Return slots that were not released by terminated workers.
+            if klever.core.components.FAIR_SHARE_SLOTS:
+                klever.core.components.FAIR_SHARE_SLOTS.reset(owner)
 
     main = decide_sub_job
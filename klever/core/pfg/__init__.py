@@ -46,7 +46,7 @@ class PFG(klever.core.components.Component):
 
         # Fragmentation
         strategy = strategy(self.logger, self.conf, tactic, self.PF_DIR)
-        attr_data, fragments_files = strategy.fragmentation(fset, tactic_name, fset_name)
+        attr_data = strategy.fragmentation(fset, tactic_name, fset_name)
 
         # Prepare attributes
         self.source_paths = strategy.source_paths
@@ -68,8 +68,14 @@ class PFG(klever.core.components.Component):
             self.vals['report id'],
             self.conf['main working directory'])
 
+        # Let VTG generate verification tasks for each program fragment as soon as its description is ready
+        fragments_files = list()
+        for pf_desc_file in strategy.generate_program_fragments_descriptions():
+            self.submit_program_fragment_desc_file(pf_desc_file)
+            fragments_files.append(pf_desc_file)
+
         self.prepare_descriptions_file(fragments_files)
-        self.excluded_clean = [self.PF_DIR, self.PF_FILE]
+        self.excluded_clean = [self.PF_DIR]
         self.excluded_clean.append(attr_data[1])
         self.logger.debug("Excluded {}".format(', '.join(self.excluded_clean)))
         self.clean_dir = True
@@ -94,9 +100,20 @@ class PFG(klever.core.components.Component):
                           self.vals['report id'],
                           self.conf['main working directory'])
 
+    def submit_program_fragment_desc_file(self, pf_desc_file):
+        """
+        !Has a callback!
+        Provide the program fragment description file to VTG.
+
+        :param pf_desc_file: The program fragment description file.
+        """
+        self.pf_desc_file = os.path.relpath(pf_desc_file, self.conf['main working directory'])
+
     def prepare_descriptions_file(self, files):
         """
-        Get the list of file with program fragments descriptions and save it to the file to provide it to VTG.
+        !Has a callback!
+        Get the list of file with program fragments descriptions and save it to the file. VTG is informed that all
+        program fragments descriptions are provided.
 
         :param files: The list of program fragment description files.
         """
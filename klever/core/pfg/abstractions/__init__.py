@@ -16,11 +16,12 @@
 #
 
 import os
-import glob
 
 from klever.core.utils import make_relative_path
+from klever.core.pfg.abstractions.callgraph import CallgraphStore
 from klever.core.pfg.abstractions.files_repr import File
 from klever.core.pfg.abstractions.fragments_repr import Fragment
+from klever.core.pfg.abstractions.paths import PathTrie
 
 
 class Program:
@@ -33,19 +34,26 @@ class Program:
         :param logger:
         :param clade:
         :param source_paths:
-        :param memory_efficient_mode:
+        :param memory_efficient_mode: Do not extract dependencies between files. This is not necessary anymore since
+                                      dependencies are extracted in the memory efficient way.
         """
         self.logger = logger
         self.clade = clade
         self.source_paths = source_paths
         self._files = dict()
         self._fragments = dict()
+        # Inverted indexes: file names to names of fragments containing them, function names to files defining and
+        # calling them
+        self._file_fragments = dict()
+        self._function_definitions = dict()
+        self._function_calls = dict()
+        # Trie of absolute paths of files
+        self._paths = None
         self.__divide()
         if not memory_efficient_mode:
-            self.logger.info("Extract dependencies between files from the program callgraph")
-            # This is very memory unefficient operation, so for Linux this is an optional step to prevent consuming
-            # gigabytes of memory
-            self.__establish_dependencies()
+            self.establish_dependencies()
+        else:
+            self.__index_functions()
 
     def create_fragment(self, name, files, add=False):
         """
@@ -69,6 +77,7 @@ class Program:
     def add_fragment(self, fragment):
         if fragment.name not in self._fragments:
             self._fragments[fragment.name] = fragment
+            self.__index_fragment_files(fragment, fragment.files)
         else:
             if not self._fragments[fragment.name].files.symmetric_difference(fragment.files):
                 self.logger.warning("There are several equal fragments {!r} extracted, keep only one".
@@ -128,8 +137,31 @@ class Program:
         if name not in self._fragments:
             raise ValueError("Cannot remove already missing fragment {!r}".format(fragment.name))
         else:
+            self.__unindex_fragment_files(self._fragments[name], self._fragments[name].files)
             del self._fragments[name]
 
+    def update_fragment_files(self, fragment, add=None, remove=None):
+        """
+        Add files to the fragment and remove files from it. Files of fragments from the collection should be changed
+        just in this way to keep the files index up to date.
+
+        :param fragment: Fragment object.
+        :param add: File objects to add.
+        :param remove: File objects to remove.
+        """
+        if add:
+            add = set(add).difference(fragment.files)
+            fragment.files.update(add)
+        if remove:
+            remove = fragment.files.intersection(remove)
+            fragment.files.difference_update(remove)
+
+        if self._fragments.get(fragment.name) is fragment:
+            if add:
+                self.__index_fragment_files(fragment, add)
+            if remove:
+                self.__unindex_fragment_files(fragment, remove)
+
     @property
     def files(self):
         """Return an iterator over File objects."""
@@ -219,6 +251,9 @@ class Program:
                 all_abs_dirs[dirname] = set()
             all_abs_dirs[dirname].add(file)
         matched_abs_files = set()
+        # Files of the program are known from compilation commands, so there is no need to traverse the filesystem
+        if self._paths is None:
+            self._paths = PathTrie(all_abs_files)
 
         # First try globes
         for path in self.source_paths + ['']:
@@ -226,9 +261,7 @@ class Program:
                 suits = False
                 expr_path = os.path.join(path, expr)
                 abs_expr_path = convert(expr_path)
-                files = set(glob.glob(abs_expr_path, recursive=True))
-                dirs = {f for f in files if os.path.isdir(f)}
-                files = {f for f in files if os.path.isfile(f)}
+                files, dirs = self._paths.glob(abs_expr_path)
 
                 for file in files:
                     if file in matched_abs_files:
@@ -254,11 +287,12 @@ class Program:
         # Check function names
         rest = expressions.difference(matched)
         if rest:
-            for file in (f for f in self.files if f not in suitable_files):
-                matched_funcs = set(file.export_functions.keys()).intersection(rest)
-                if matched_funcs:
-                    suitable_files.add(file)
-                    matched.update(matched_funcs)
+            matched_by_paths = set(suitable_files)
+            for func in rest:
+                for file in self._function_definitions.get(func, ()):
+                    if file not in matched_by_paths:
+                        suitable_files.add(file)
+                        matched.add(func)
 
         return suitable_files, matched
 
@@ -295,11 +329,9 @@ class Program:
         :return: Set of Fragment objects.
         """
         frags = set()
-        files = {f if isinstance(f, str) else f.name for f in files}
-        if files:
-            for frag in self.fragments:
-                if {f.name for f in frag.files}.intersection(files):
-                    frags.add(frag)
+        for file in files:
+            for name in self._file_fragments.get(file if isinstance(file, str) else file.name, ()):
+                frags.add(self._fragments[name])
         return frags
 
     def get_files_calling_functions(self, functions):
@@ -310,10 +342,8 @@ class Program:
         :return: File objects.
         """
         files = set()
-        if functions:
-            for file in self.files:
-                if set(file.import_functions.keys()).intersection(functions):
-                    files.add(file)
+        for func in functions or ():
+            files.update(self._function_calls.get(func, ()))
         return files
 
     def collect_dependencies(self, files, filter_func=lambda x: True, depth=None, max=None):
@@ -347,6 +377,30 @@ class Program:
 
         return deps
 
+    def establish_dependencies(self, cache=None):
+        """
+        Analyze the callgraph of the program and add to each File object function names that are exported and function
+        names that are imported with links to File objects that export these functions. The callgraph is loaded in
+        batches of files and is kept in the compact form, so this does not require much memory even for very big
+        programs.
+
+        :param cache: FragmentationCache object to reuse dependencies of files that did not change.
+        """
+        self.logger.info("Extract dependencies between files from the program callgraph")
+        store = CallgraphStore(self.clade, self._files, cache=cache)
+
+        # Fulfil callgraph dependencies
+        for path, called_function, called_definition_scope, match_score in store.calls:
+            self._files[path].add_import_function(called_function, self._files[called_definition_scope], match_score)
+
+        # Add global functions
+        for path, func in store.exports:
+            self._files[path].add_export_function(func)
+
+        self._function_definitions.clear()
+        self._function_calls.clear()
+        self.__index_functions()
+
     def __divide(self):
         """Analyze CC commands and add all found .c files for further program decomposition."""
         # Out file is used just to get an identifier for the fragment, thus it is Ok to use a random first. Later we
@@ -377,6 +431,26 @@ class Program:
                         file.size = 0
                     self._files[name] = file
 
+    def __index_fragment_files(self, fragment, files):
+        for file in files:
+            self._file_fragments.setdefault(file.name, set()).add(fragment.name)
+
+    def __unindex_fragment_files(self, fragment, files):
+        for file in files:
+            names = self._file_fragments.get(file.name)
+            if names:
+                names.discard(fragment.name)
+                if not names:
+                    del self._file_fragments[file.name]
+
+    def __index_functions(self):
+        """Collect files defining and calling each global function."""
+        for file in self.files:
+            for func in file.export_functions:
+                self._function_definitions.setdefault(func, set()).add(file)
+            for func in file.import_functions:
+                self._function_calls.setdefault(func, set()).add(file)
+
     def __check_cc(self, desc):
         """
         Sanity checks for CC commands.
@@ -385,40 +459,3 @@ class Program:
         """
         if len(desc['out']) != 1:
             raise NotImplementedError('CC build commands with more than one output file are not supported')
-
-    def __establish_dependencies(self):
-        """
-        Analyze the callgraph of the program and add to each File object function names that are exported and function
-        names that are imported with links to File objects that export these functions. This function requires an
-        extremely huge amount of memory if the program is very big. This is because the callgraph itself can be quite
-        large.
-        """
-        cg = self.clade.callgraph
-        fs = self.clade.functions_by_file
-
-        # Fulfil callgraph dependencies
-        for path, functions in ((p, f) for p, f in cg.items() if p in self._files):
-            file_repr = self._files[path]
-            for func, func_desc in functions.items():
-                tp = func_desc.get('type', 'static')
-                if tp != 'static':
-                    file_repr.add_export_function(func)
-
-                for called_definition_scope, called_functions in \
-                        ((s, d) for s, d in func_desc.get('calls', dict()).items()
-                         if s != path and s != 'unknown' and s in self._files):
-                    called_definition_file = self._files[called_definition_scope]
-                    # Beware of such bugs in callgraph
-                    for called_function in (c for c in called_functions
-                                            if fs.get(called_definition_scope, dict()).get(c, dict()).
-                                            get('type', 'static') != 'static'):
-                        match_score = list(called_functions[called_function].values())[0]["match_type"]
-                        file_repr.add_import_function(called_function, called_definition_file, match_score)
-
-        # Add rest global functions
-        for path, functions in ((p, f) for p, f in fs.items() if p in self._files):
-            file_repr = self._files[path]
-            for func, func_desc in functions.items():
-                tp = func_desc.get('type', 'static')
-                if tp != 'static':
-                    file_repr.add_export_function(func)
@@ -0,0 +1,217 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+from array import array
+
+
+class CallgraphStore:
+    """
+    Compact representation of calls of global functions between files of the program. File and function names are
+    interned to integer identifiers while calls are kept in compressed sparse row arrays: calls from the i-th calling
+    file are stored at positions from offsets[i] to offsets[i + 1]. The Clade callgraph and functions are loaded for
+    batches of files and just calls between considered files are kept, so memory consumption does not depend on the size
+    of the whole callgraph.
+    """
+
+    # Callgraph and functions of that many files are requested from Clade at once.
+    BATCH_SIZE = 1000
+
+    def __init__(self, clade, files, batch_size=BATCH_SIZE, cache=None):
+        """
+        Extract calls between given files from the Clade callgraph.
+
+        :param clade: Clade object.
+        :param files: Names of files to be considered.
+        :param batch_size: The number of files to get the callgraph and functions for at once.
+        :param cache: FragmentationCache object to reuse functions and calls of files that did not change since
+                      previous runs.
+        """
+        self._names = []
+        self._ids = {}
+
+        # Global functions defined in files as file and function identifiers combined into single integers.
+        self._exports = set()
+
+        self.callers = array('l')
+        self.offsets = array('q', [0])
+        self.functions = array('l')
+        self.callees = array('l')
+        self.scores = array('l')
+
+        files = sorted(files)
+        file_ids = {file: self.intern(file) for file in files}
+        unknown_id = self.intern('unknown')
+
+        # Global functions defined according to Clade functions and the callgraph and calls to functions defined in
+        # other considered files or in unknown ones as flat triples of called function, file defining it and match
+        # score.
+        definitions = {}
+        exports = {}
+        calls = {}
+
+        cached = set()
+        dependencies_digests = {}
+        if cache:
+            for file in files:
+                desc = cache.get_file_dependencies(file)
+                if desc:
+                    file_id = file_ids[file]
+                    definitions[file_id] = array('l', (self.intern(func) for func in desc['definitions']))
+                    exports[file_id] = array('l', (self.intern(func) for func in desc['exports']))
+                    calls[file_id] = array('l', (identifier for called_function, scope, match_score in desc['calls']
+                                                 for identifier in (self.intern(called_function), self.intern(scope),
+                                                                    match_score)))
+                    dependencies_digests[file_id] = desc['dependencies']
+                    cached.add(file)
+
+        fresh = [file for file in files if file not in cached]
+        self.__load(clade, fresh, batch_size, file_ids, definitions, exports, calls)
+
+        if cache:
+            # Definitions and exports of files depend just on their contents, so cached ones are valid. Calls also
+            # depend on files defining called functions, so cached calls are valid just if called functions are defined
+            # by the same files with the same contents as when calls were cached. This holds for calls of functions
+            # that are not defined by considered files (the scope is "unknown") as well.
+            definers = {}
+            for file in files:
+                file_id = file_ids[file]
+                for func in set(definitions[file_id]).union(exports[file_id]):
+                    definers.setdefault(func, []).append(file_id)
+
+            stale = [file for file in files if file in cached and dependencies_digests[file_ids[file]] !=
+                     self.__get_dependencies_digest(cache, calls[file_ids[file]], definers)]
+            self.__load(clade, stale, batch_size, file_ids, definitions, exports, calls)
+
+            for file in fresh + stale:
+                file_id = file_ids[file]
+                file_calls = calls[file_id]
+                cache.put_file_dependencies(file, {
+                    'definitions': [self._names[func] for func in definitions[file_id]],
+                    'exports': [self._names[func] for func in exports[file_id]],
+                    'calls': [[self._names[file_calls[i]], self._names[file_calls[i + 1]], file_calls[i + 2]]
+                              for i in range(0, len(file_calls), 3)],
+                    'dependencies': self.__get_dependencies_digest(cache, file_calls, definers)
+                })
+
+        for file in files:
+            file_id = file_ids[file]
+            self._exports.update(self.__key(file_id, func) for func in definitions[file_id])
+
+        for file in files:
+            file_id = file_ids[file]
+            file_calls = calls[file_id]
+            for i in range(0, len(file_calls), 3):
+                called_function, callee_id, match_score = file_calls[i:i + 3]
+                # Beware of such bugs in callgraph
+                if callee_id == unknown_id or self.__key(callee_id, called_function) not in self._exports:
+                    continue
+
+                self.functions.append(called_function)
+                self.callees.append(callee_id)
+                self.scores.append(match_score)
+
+            if len(self.functions) > self.offsets[-1]:
+                self.callers.append(file_id)
+                self.offsets.append(len(self.functions))
+
+        # Functions exported according to the callgraph are not taken into account when checking called functions.
+        for file in files:
+            file_id = file_ids[file]
+            self._exports.update(self.__key(file_id, func) for func in exports[file_id])
+
+    def __get_dependencies_digest(self, cache, file_calls, definers):
+        """Get the digest of files defining functions called by the file and of their contents."""
+        digest = hashlib.sha1()
+        for func in sorted({self._names[file_calls[i]] for i in range(0, len(file_calls), 3)}):
+            digest.update(func.encode('utf8'))
+            for file in sorted(self._names[file_id] for file_id in definers.get(self._ids[func], ())):
+                digest.update(b'\0')
+                digest.update(file.encode('utf8'))
+                digest.update(cache.get_file_digest(file).encode('utf8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def __load(self, clade, files, batch_size, file_ids, definitions, exports, calls):
+        """Get global functions and calls of given files from Clade."""
+        for file in files:
+            file_id = file_ids[file]
+            definitions[file_id] = array('l')
+            exports[file_id] = array('l')
+            calls[file_id] = array('l')
+
+        for batch in (files[i:i + batch_size] for i in range(0, len(files), batch_size)):
+            batch_files = set(batch)
+
+            for path, functions in (clade.get_functions_by_file(batch) or {}).items():
+                if path in batch_files:
+                    definitions[file_ids[path]].extend(self.intern(func) for func, func_desc in functions.items()
+                                                       if func_desc.get('type', 'static') != 'static')
+
+            for path, functions in (clade.get_callgraph(batch) or {}).items():
+                if path not in batch_files:
+                    continue
+
+                file_id = file_ids[path]
+                for func, func_desc in functions.items():
+                    if func_desc.get('type', 'static') != 'static':
+                        exports[file_id].append(self.intern(func))
+
+                    for called_definition_scope, called_functions in func_desc.get('calls', dict()).items():
+                        if called_definition_scope == path or \
+                                (called_definition_scope != 'unknown' and called_definition_scope not in file_ids):
+                            continue
+
+                        scope_id = self.intern(called_definition_scope)
+                        for called_function, called_function_desc in called_functions.items():
+                            calls[file_id].extend((self.intern(called_function), scope_id,
+                                                   list(called_function_desc.values())[0]["match_type"]))
+
+    def intern(self, name):
+        """
+        Get an identifier of the file or function name.
+
+        :param name: Name string.
+        :return: Integer identifier.
+        """
+        identifier = self._ids.get(name)
+        if identifier is None:
+            identifier = len(self._names)
+            self._ids[name] = identifier
+            self._names.append(name)
+        return identifier
+
+    def name(self, identifier):
+        return self._names[identifier]
+
+    @property
+    def exports(self):
+        """Return an iterator over pairs of file and global function names defined in them."""
+        for key in self._exports:
+            yield self._names[key >> 32], self._names[key & 0xFFFFFFFF]
+
+    @property
+    def calls(self):
+        """Return an iterator over calling file, called function, file defining this function and match scores."""
+        for i, caller in enumerate(self.callers):
+            caller = self._names[caller]
+            for j in range(self.offsets[i], self.offsets[i + 1]):
+                yield caller, self._names[self.functions[j]], self._names[self.callees[j]], self.scores[j]
+
+    @staticmethod
+    def __key(file_id, function_id):
+        return file_id << 32 | function_id
@@ -15,6 +15,49 @@
 # limitations under the License.
 #
 
+import collections.abc
+import types
+
+
+class SetView(collections.abc.Set):
+    """Read-only view of a set that is not copied on access."""
+
+    def __init__(self, items):
+        self._items = items
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # Results of set operations are usual sets.
+        return set(iterable)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return repr(self._items)
+
+
+class ImportFunctionsView(collections.abc.Mapping):
+    """Read-only view of imported functions with their definition scopes."""
+
+    def __init__(self, import_functions):
+        self._import_functions = import_functions
+
+    def __getitem__(self, function_name):
+        return self._import_functions[function_name][0]
+
+    def __iter__(self):
+        return iter(self._import_functions)
+
+    def __len__(self):
+        return len(self._import_functions)
+
 
 class File:
 
@@ -41,19 +84,19 @@ class File:
 
     @property
     def successors(self):
-        return set(self._successors)
+        return SetView(self._successors)
 
     @property
     def predecessors(self):
-        return set(self._predecessors)
+        return SetView(self._predecessors)
 
     @property
     def export_functions(self):
-        return dict(self._export_functions)
+        return types.MappingProxyType(self._export_functions)
 
     @property
     def import_functions(self):
-        return {f: desc[0] for f, desc in self._import_functions.items()}
+        return ImportFunctionsView(self._import_functions)
 
     def __lt__(self, other):
         return self.name < other.name
@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import fnmatch
+import functools
+import glob
+import re
+
+
+class PathNode:
+
+    __slots__ = ('path', 'parent', 'children', 'is_file')
+
+    def __init__(self, path, parent=None):
+        self.path = path
+        self.parent = parent if parent else self
+        self.children = dict()
+        self.is_file = False
+
+
+class PathTrie:
+    """
+    Trie of paths of program files and directories containing them. It matches glob expressions like glob.glob() with
+    recursive=True does for the filesystem but without traversing directories that do not contain program files.
+    """
+
+    def __init__(self, paths):
+        """
+        :param paths: Paths of files.
+        """
+        self.root = PathNode('')
+        for path in paths:
+            node = self.root
+            for name in path.split('/'):
+                child = node.children.get(name)
+                if not child:
+                    child = PathNode(name if node is self.root else node.path + '/' + name, node)
+                    node.children[name] = child
+                node = child
+            node.is_file = True
+
+    def glob(self, pattern):
+        """
+        Find files and directories matching the glob expression.
+
+        :param pattern: Glob expression.
+        :return: Set of file paths, set of directory paths.
+        """
+        if not pattern:
+            return set(), set()
+
+        components = pattern.split('/')
+        # Like the filesystem, ignore repeating slashes while trailing ones mean that just directories should match.
+        dirs_only = len(components) > 1 and not components[-1]
+        components = components[:1] + [component for component in components[1:] if component]
+
+        nodes = {self.root}
+        for component in components:
+            if component == '**':
+                nodes = set(self.__descendants(nodes))
+            elif glob.has_magic(component):
+                regex = self.__compile(component)
+                # Like glob, wildcards do not match hidden files unless the expression starts with a dot.
+                hidden = component.startswith('.')
+                nodes = {child for node in nodes for name, child in node.children.items()
+                         if (hidden or not name.startswith('.')) and regex(name)}
+            elif component == '.':
+                nodes = {node for node in nodes if not node.is_file}
+            elif component == '..':
+                nodes = {node.parent for node in nodes if not node.is_file}
+            else:
+                nodes = {node.children[component] for node in nodes if component in node.children}
+
+            if not nodes:
+                break
+
+        files = {node.path for node in nodes if node.is_file and not dirs_only}
+        dirs = {node.path for node in nodes if not node.is_file and node is not self.root}
+
+        return files, dirs
+
+    @staticmethod
+    def __descendants(nodes):
+        # Like glob, "**" matches zero or more directories except hidden ones.
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(child for name, child in node.children.items() if not name.startswith('.'))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def __compile(component):
+        return re.compile(fnmatch.translate(component)).match
@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+
+from klever.core.pfg.abstractions.callgraph import CallgraphStore
+from klever.core.pfg.cache import FragmentationCache
+
+
+logger = logging.getLogger('test_callgraph')
+logger.disabled = True
+
+
+class File:
+    def __init__(self, name, abs_path):
+        self.name = name
+        self.cmd_id = name
+        self.cmd_type = 'CC'
+        self.abs_path = abs_path
+
+
+class FakeClade:
+    """Clade that resolves calls to files defining called functions like the real callgraph does."""
+
+    def __init__(self, storage, program):
+        self.storage = storage
+        self.program = program
+        self.queried_files = []
+
+    def get_uuid(self):
+        return 'build base'
+
+    def get_cmd(self, cmd_id, with_opts=False, with_deps=False):
+        return {'opts': [], 'deps': []}
+
+    def get_storage_path(self, path):
+        return str(self.storage / path)
+
+    def get_functions_by_file(self, files):
+        self.queried_files.extend(files)
+        return {file: {func: {'type': 'global'} for func in self.program[file][0]} for file in files}
+
+    def get_callgraph(self, files):
+        definers = {func: file for file, (definitions, _) in self.program.items() for func in definitions}
+        callgraph = {}
+        for file in files:
+            calls = {}
+            for func in self.program[file][1]:
+                calls.setdefault(definers.get(func, 'unknown'), {})[func] = {'call': {'match_type': 1}}
+            callgraph[file] = {'main': {'type': 'static', 'calls': calls}}
+        return callgraph
+
+
+def get_calls(tmp_path, program, use_cache=True):
+    storage = tmp_path / 'storage'
+    storage.mkdir(exist_ok=True)
+    for file, desc in program.items():
+        (storage / file).write_text(repr(desc))
+
+    clade = FakeClade(storage, program)
+    cache = None
+    if use_cache:
+        cache = FragmentationCache(logger, str(tmp_path / 'cache'), clade, {})
+        cache.set_files(File(file, clade.get_storage_path(file)) for file in program)
+
+    return sorted(CallgraphStore(clade, list(program), cache=cache).calls), clade.queried_files
+
+
+def test_cached_calls_of_changed_callees(tmp_path):
+    # Function "f" called from "a.c" is defined in different files while "a.c" does not change. Each program state is
+    # considered several times, so calls of "a.c" are cached for each of them.
+    b_defines = {'a.c': ((), ('f',)), 'b.c': (('f',), ()), 'c.c': ((), ())}
+    c_defines = {'a.c': ((), ('f',)), 'b.c': ((), ()), 'c.c': (('f',), ())}
+    nobody_defines = {'a.c': ((), ('f',)), 'b.c': ((), ()), 'c.c': ((), ())}
+
+    for program in (b_defines, c_defines, nobody_defines, b_defines, c_defines, nobody_defines, b_defines):
+        calls, _ = get_calls(tmp_path, program)
+        assert calls == get_calls(tmp_path, program, use_cache=False)[0]
+
+    # Nothing changed since the previous time, so the callgraph is not queried at all.
+    calls, queried_files = get_calls(tmp_path, b_defines)
+    assert calls == [('a.c', 'f', 'b.c', 1)]
+    assert not queried_files
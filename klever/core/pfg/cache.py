@@ -0,0 +1,249 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import json
+import os
+import shutil
+
+import klever.core.utils
+
+
+class FragmentationCache:
+    """
+    Content-addressed cache of program fragmentation results. Results are keyed by fragmentation options and by
+    contents of all program files including their compilation options and dependencies, so they are reused for other
+    build bases of the same program as well. Functions and calls of each file are cached separately together with the
+    digest of files defining called functions, thus when just some files change, just their dependencies and
+    dependencies of files calling functions defined by changed files are extracted from the callgraph once again.
+
+    Program fragments are not reused one by one. Units, groups of fragments and their descriptions are built in memory
+    from names of files and dependencies between them rather than from contents of files, so when some files change,
+    they are built anew for the whole program without loading the callgraph for files that did not change.
+
+    Cache layout:
+    configurations/<options key>/bases/<Clade UUID> - the contents key of the build base,
+    configurations/<options key>/results/<contents key>.json - names of program fragments description files,
+                                                                aggregations description and attributes,
+    objects/<object key> - program fragments descriptions and aggregations descriptions addressed by their checksums,
+    files/<file key>.json - global functions and calls of the file and the digest of files defining called functions.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(self, logger, cache_dir, clade, options):
+        """
+        :param logger: Logger object.
+        :param cache_dir: Cache directory.
+        :param clade: Clade object.
+        :param options: Dictionary with all options that affect fragmentation results.
+        """
+        self.logger = logger
+        self.clade = clade
+        self.cache_dir = os.path.join(cache_dir, str(self.FORMAT_VERSION))
+        self.options_dir = os.path.join(self.cache_dir, 'configurations', self.__get_key(
+            json.dumps(options, sort_keys=True, default=lambda obj: sorted(obj))))
+        self.base_file = os.path.join(self.options_dir, 'bases', self.clade.get_uuid())
+
+        self.__contents_key = None
+        self.__files_key = None
+        self.__file_digests = dict()
+
+    def get_result(self):
+        """
+        Get cached fragmentation results. Before set_files() is called, results can be found just for the same build
+        base.
+
+        :return: Dictionary with results or None.
+        """
+        contents_key = self.__contents_key
+        if not contents_key and os.path.isfile(self.base_file):
+            with open(self.base_file, encoding='utf8') as fp:
+                contents_key = fp.read().strip()
+        if not contents_key:
+            return None
+
+        result_file = os.path.join(self.options_dir, 'results', contents_key + '.json')
+        if not os.path.isfile(result_file):
+            return None
+
+        with open(result_file, encoding='utf8') as fp:
+            result = json.load(fp)
+
+        # Objects could be removed from the cache partially.
+        objects = [obj for _, obj in result['fragments']] + [result['data']]
+        if not all(os.path.isfile(self.__get_object_file(obj)) for obj in objects):
+            return None
+
+        return result
+
+    def put_result(self, fragments_files, pf_dir, attr_data):
+        """
+        Save fragmentation results.
+
+        :param fragments_files: List of program fragments description files.
+        :param pf_dir: Program fragments descriptions directory.
+        :param attr_data: Attributes and the name of the aggregations description file.
+        """
+        if not self.__contents_key:
+            return
+
+        result = {
+            'fragments': [[os.path.relpath(file, pf_dir), self.__put_object(file)] for file in fragments_files],
+            'data': self.__put_object(attr_data[1]),
+            'attrs': attr_data[0]
+        }
+        if None in (obj for _, obj in result['fragments']) or result['data'] is None:
+            return
+
+        self.__write(os.path.join(self.options_dir, 'results', self.__contents_key + '.json'),
+                     json.dumps(result, ensure_ascii=True, sort_keys=True))
+
+    def restore_data(self, result, data_file):
+        """
+        Create the aggregations description file from the cached one.
+
+        :param result: Dictionary returned by get_result().
+        :param data_file: The name of the aggregations description file.
+        :return: Attributes and the name of the aggregations description file.
+        """
+        shutil.copyfile(self.__get_object_file(result['data']), data_file)
+
+        return result['attrs'], data_file
+
+    def restore_descriptions(self, result, pf_dir):
+        """
+        Create program fragments description files from cached ones.
+
+        :param result: Dictionary returned by get_result().
+        :param pf_dir: Program fragments descriptions directory.
+        :return: Iterator over program fragments description files.
+        """
+        for name, obj in result['fragments']:
+            pf_desc_file = os.path.join(pf_dir, name)
+            if os.path.isfile(pf_desc_file):
+                raise FileExistsError('Program fragment description file {!r} already exists'.format(pf_desc_file))
+            os.makedirs(os.path.dirname(pf_desc_file), exist_ok=True)
+            shutil.copyfile(self.__get_object_file(obj), pf_desc_file)
+            yield pf_desc_file
+
+    def set_files(self, files):
+        """
+        Calculate digests of program files to find results for other build bases and to reuse dependencies of files.
+
+        :param files: Iterable over File objects.
+        """
+        self.logger.info('Calculate digests of program files')
+        checksums = dict()
+
+        def get_checksum(path):
+            if path not in checksums:
+                checksums[path] = klever.core.utils.get_file_checksum(path) if os.path.isfile(path) else ''
+            return checksums[path]
+
+        files = sorted(files, key=lambda f: f.name)
+        for file in files:
+            desc = self.clade.get_cmd(file.cmd_id, with_opts=True, with_deps=True)
+            self.__file_digests[file.name] = self.__get_key(
+                file.name, get_checksum(file.abs_path), *desc.get('opts', []),
+                *('{0}:{1}'.format(dep, get_checksum(self.clade.get_storage_path(dep)))
+                  for dep in sorted(desc.get('deps', []))))
+
+        # Dependencies of files are valid just for the same set of files.
+        self.__files_key = self.__get_key(*(file.name for file in files))
+        self.__contents_key = self.__get_key(*('{0}:{1}:{2}:{3}'.format(file.name, file.cmd_id, file.cmd_type,
+                                                                         self.__file_digests[file.name])
+                                               for file in files))
+        self.__write(self.base_file, self.__contents_key)
+
+    def get_file_dependencies(self, name):
+        """
+        Get cached global functions and calls of the file.
+
+        :param name: File name.
+        :return: Dictionary or None.
+        """
+        dependencies_file = self.__get_dependencies_file(name)
+        if not dependencies_file or not os.path.isfile(dependencies_file):
+            return None
+
+        with open(dependencies_file, encoding='utf8') as fp:
+            return json.load(fp)
+
+    def put_file_dependencies(self, name, desc):
+        """
+        Save global functions and calls of the file.
+
+        :param name: File name.
+        :param desc: Dictionary.
+        """
+        dependencies_file = self.__get_dependencies_file(name)
+        if dependencies_file:
+            self.__write(dependencies_file, klever.core.utils.json_dumps_compact(desc))
+
+    def get_file_digest(self, name):
+        """
+        Get the digest of the file contents including its compilation options and dependencies.
+
+        :param name: File name.
+        :return: Digest string.
+        """
+        return self.__file_digests[name]
+
+    def __get_dependencies_file(self, name):
+        if name not in self.__file_digests:
+            return None
+
+        key = self.__get_key(self.__files_key, name, self.__file_digests[name])
+        return os.path.join(self.cache_dir, 'files', key[:2], key + '.json')
+
+    def __put_object(self, file):
+        with open(file, 'rb') as fp:
+            content = fp.read()
+
+        obj = hashlib.sha1(content).hexdigest()
+        if not os.path.isfile(self.__get_object_file(obj)) and \
+                not self.__write(self.__get_object_file(obj), content):
+            return None
+
+        return obj
+
+    def __get_object_file(self, obj):
+        return os.path.join(self.cache_dir, 'objects', obj[:2], obj)
+
+    def __write(self, file, content):
+        # Other jobs can use the cache simultaneously, so cached files should appear atomically. Do not fail if the
+        # cache is not writable.
+        try:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            tmp_file = '{0}.{1}'.format(file, os.getpid())
+            with open(tmp_file, 'wb') as fp:
+                fp.write(content.encode('utf8') if isinstance(content, str) else content)
+            os.replace(tmp_file, file)
+        except OSError as e:
+            self.logger.debug('Could not write cache file "{0}": {1}'.format(file, e))
+            return False
+
+        return True
+
+    @staticmethod
+    def __get_key(*items):
+        key = hashlib.sha1()
+        for item in items:
+            key.update(str(item).encode('utf8'))
+            key.update(b'\0')
+        return key.hexdigest()
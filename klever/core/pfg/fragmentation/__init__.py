@@ -15,14 +15,17 @@
 # limitations under the License.
 #
 
+import multiprocessing
 import os
-import ujson
+import queue
 
 from graphviz import Digraph
-from clade import Clade
 
-from klever.core.utils import make_relative_path
+from klever.core.clade import Clade
+from klever.core.components import fair_share_slot
+from klever.core.utils import make_relative_path, json_dump, get_parallel_threads_num, get_cache_dir
 from klever.core.pfg.abstractions import Program
+from klever.core.pfg.cache import FragmentationCache
 from klever.core.pfg.abstractions.strategies import Abstract
 
 
@@ -51,6 +54,13 @@ class FragmentationAlgorythm:
         self.files_to_keep = list()
         self.project_attrs = list()
 
+        # Results of fragmentation that are necessary to generate program fragments descriptions
+        self.__program = None
+        self.__grps = None
+        self.__attr_data = None
+        self.__cache = None
+        self.__cached_result = None
+
         self.source_paths = self.conf['working source trees']
 
         # Import clade
@@ -66,22 +76,44 @@ class FragmentationAlgorythm:
         components of the program called units, then chooses files and units that should be verified according to the
         configuration provided by the user, gets the fragmentation set and reconstruct fragments if necessary according
         to this manually provided description, then add dependencies if necessary to each fragment that should be
-        verified and generate the description of each program fragment. The description contains in addition to the
-        files names compilation commands to get their options and dependencies between files.
+        verified and prepare data attributes. Descriptions of program fragments are generated by
+        generate_program_fragments_descriptions() later.
 
         :parameter fragmentation_set: Fragmentation set description dict.
         :parameter tactic_name: Fragmentation tactic name.
         :parameter fset_name: Fragmentation set name.
+        :return: Attributes and the name of the aggregations description file.
         """
-        # Extract dependencies
         self.logger.info("Start program fragmentation")
+        cache = self.__get_cache(fragmentation_set, tactic_name, fset_name)
+        self.__cache = cache
+        result = cache.get_result() if cache else None
+        if result:
+            self.logger.info("Use cached program fragments for the build base")
+            self.__cached_result = result
+            return cache.restore_data(result, 'agregations description.json')
+
+        # Extract dependencies
         if self.tactic.get('ignore dependencies'):
-            self.logger.info("Use memory efficient mode with limitied dependencies extraction")
+            self.logger.info("Do not extract dependencies between files and functions")
             memory_efficient_mode = True
         else:
             self.logger.info("Extract full dependencies between files and functions")
             memory_efficient_mode = False
-        deps = Program(self.logger, self.clade, self.source_paths, memory_efficient_mode=memory_efficient_mode)
+        # Dependencies are not necessary if the program files did not change since some previous fragmentation.
+        # Otherwise fragments are determined anew for the whole program while dependencies are extracted from the
+        # callgraph just for changed files and files calling functions defined by them.
+        deps = Program(self.logger, self.clade, self.source_paths,
+                       memory_efficient_mode=memory_efficient_mode or cache is not None)
+        if cache:
+            cache.set_files(deps.files)
+            result = cache.get_result()
+            if result:
+                self.logger.info("Use cached program fragments since program files did not change")
+                self.__cached_result = result
+                return cache.restore_data(result, 'agregations description.json')
+            if not memory_efficient_mode:
+                deps.establish_dependencies(cache)
 
         # Decompose using units
         self.logger.info("Determine units in the target program")
@@ -106,7 +138,7 @@ class FragmentationAlgorythm:
                 allfiles = set()
                 for item in defined_groups[manual]:
                     allfiles.update(item.files)
-                fragment.files.difference_update(allfiles)
+                deps.update_fragment_files(fragment, remove=allfiles)
 
         # Before describing files add manually defined files
         for group in grps:
@@ -121,10 +153,6 @@ class FragmentationAlgorythm:
                 if old.symmetric_difference(grps[group][1]):
                     update = True
 
-        # Prepare program fragments
-        self.logger.info("Generate program fragments")
-        fragments_files = self.__generate_program_fragments_descriptions(deps, grps)
-
         # Prepare data attributes
         self.logger.info("Prepare data attributes for generated fragments")
         attr_data = self.__prepare_data_files(grps, tactic_name, fset_name)
@@ -135,7 +163,32 @@ class FragmentationAlgorythm:
             for fragment in deps.fragments:
                 self.__draw_fragment(fragment)
 
-        return attr_data, fragments_files
+        self.__program = deps
+        self.__grps = grps
+        self.__attr_data = attr_data
+
+        return attr_data
+
+    def generate_program_fragments_descriptions(self):
+        """
+        Generate json files with descriptions of each program fragment that should be verified after fragmentation().
+        Descriptions are generated in parallel and each of them is provided as soon as it is ready, so verification
+        tasks can be generated before all descriptions are ready.
+
+        :return: Iterator over program fragments description files.
+        """
+        self.logger.info("Generate program fragments")
+        if self.__cached_result:
+            yield from self.__cache.restore_descriptions(self.__cached_result, self.pf_dir)
+            return
+
+        fragments_files = list()
+        for pf_desc_file in self.__generate_program_fragments_descriptions(self.__program, self.__grps):
+            fragments_files.append(pf_desc_file)
+            yield pf_desc_file
+
+        if self.__cache:
+            self.__cache.put_result(fragments_files, self.pf_dir, self.__attr_data)
 
     def _determine_units(self, program):
         """
@@ -266,8 +319,7 @@ class FragmentationAlgorythm:
         # Do modification
         empty = set()
         for fragment in program.fragments:
-            fragment.files.update(addiction)
-            fragment.files.difference_update(removal)
+            program.update_fragment_files(fragment, add=addiction, remove=removal)
             if not fragment.files:
                 empty.add(fragment)
 
@@ -288,6 +340,36 @@ class FragmentationAlgorythm:
         aggregator = Abstract(self.logger, self.conf, self.tactic, program)
         return aggregator.get_groups()
 
+    def __get_cache(self, fragmentation_set, tactic_name, fset_name):
+        """
+        Get the cache of fragmentation results if they can be reused.
+
+        :param fragmentation_set: Fragmentation set description dict.
+        :param tactic_name: Fragmentation tactic name.
+        :param fset_name: Fragmentation set name.
+        :return: FragmentationCache object or None.
+        """
+        # Fragments are printed on the base of dependencies and aggregation by coverage depends on external archives
+        if not self.conf.get('program fragments cache', True) or self.tactic.get('print fragments') or \
+                self.tactic.get('add modules by coverage'):
+            return None
+
+        cache_dir = get_cache_dir(self.conf, 'program fragments cache directory', 'program fragments')
+        options = {
+            'strategy': type(self).__name__,
+            'Clade preset': self.CLADE_PRESET,
+            'tactic': self.tactic,
+            'tactic name': tactic_name,
+            'fragmentation set': fragmentation_set,
+            'fragmentation set name': fset_name,
+            'targets': self.conf.get('targets'),
+            'exclude targets': self.conf.get('exclude targets'),
+            'working source trees': self.source_paths,
+            'keep intermediate files': self.conf['keep intermediate files']
+        }
+
+        return FragmentationCache(self.logger, cache_dir, self.clade, options)
+
     def __prepare_data_files(self, grps, tactic, fragmentation_set):
         """
         Prepare data files that describe program fragments content.
@@ -306,8 +388,7 @@ class FragmentationAlgorythm:
             }
 
         with open('agregations description.json', 'w', encoding='utf8') as fp:
-            ujson.dump(data, fp, sort_keys=True, indent=4, ensure_ascii=False,
-                       escape_forward_slashes=False)
+            json_dump(data, fp, self.conf['keep intermediate files'])
 
         return [{
             'name': 'Program fragmentation',
@@ -336,16 +417,55 @@ class FragmentationAlgorythm:
 
     def __generate_program_fragments_descriptions(self, program, grps):
         """
-        Generate json files with descriptions of each program fragment that should be verified.
+        Generate json files with descriptions of each program fragment that should be verified. Processes generating
+        descriptions get the program and groups of fragments by forking.
 
         :param program: Program object.
         :param grps: Dictionary with program fragments with dependecnies.
-        :return: A list of file names.
+        :return: Iterator over program fragments description files.
         """
-        files = list()
-        for name, grp in grps.items():
-            files.append(self.__describe_program_fragment(program, name, grp))
-        return files
+        names = list(grps.keys())
+        workers_num = min(get_parallel_threads_num(self.logger, self.conf), len(names))
+        if workers_num <= 1:
+            for name in names:
+                yield self.__describe_program_fragment(program, name, grps[name])
+            return
+
+        ready = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=self.__describe_program_fragments,
+                                           args=(program, grps, names[i::workers_num], ready))
+                   for i in range(workers_num)]
+        for worker in workers:
+            worker.start()
+
+        try:
+            finished_workers_num = 0
+            while finished_workers_num < workers_num:
+                try:
+                    pf_desc_file = ready.get(timeout=1)
+                except queue.Empty:
+                    if any(worker.exitcode for worker in workers):
+                        raise RuntimeError('Generation of program fragments descriptions failed')
+                    continue
+
+                if pf_desc_file is None:
+                    finished_workers_num += 1
+                else:
+                    yield pf_desc_file
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+            ready.close()
+
+    def __describe_program_fragments(self, program, grps, names, ready):
+        for name in names:
+            # Within sub-jobs workers occupy slots shared by all sub-jobs like ones generating tasks.
+            with fair_share_slot():
+                pf_desc_file = self.__describe_program_fragment(program, name, grps[name])
+            ready.put(pf_desc_file)
+        ready.put(None)
 
     def __describe_program_fragment(self, program, name, grp):
         """
@@ -392,7 +512,7 @@ class FragmentationAlgorythm:
             os.makedirs(dir_path, exist_ok=True)
 
         with open(pf_desc_file, 'w', encoding='utf8') as fp:
-            ujson.dump(pf_desc, fp, sort_keys=True, indent=4, ensure_ascii=False, escape_forward_slashes=False)
+            json_dump(pf_desc, fp, self.conf['keep intermediate files'])
         return pf_desc_file
 
     def __print_fragments(self, program):
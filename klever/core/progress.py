@@ -33,7 +33,7 @@ class PW(klever.core.components.Component):
         self.mqs['total tasks'] = multiprocessing.Queue()
         self.first_task_flag = multiprocessing.Value('i', 0)
         self.vals['task solving flag'] = self.first_task_flag
-        self.subjobs = multiprocessing.Manager().dict()
+        self.subjobs = klever.core.utils.SharedDict(total_subjobs or 1)
         self.vals['subjobs progress'] = self.subjobs
 
         self.session = session
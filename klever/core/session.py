@@ -15,12 +15,30 @@
 # limitations under the License.
 #
 
-import json
+import hashlib
+import io
 import os
+import random
 import requests
+import requests.adapters
+import tarfile
+import tempfile
 import time
 import zipfile
 
+import klever.core.utils
+
+
+# Authentication tokens are shared by all sessions of the same user at the same Klever Bridge including sessions created
+# within forked processes. HTTP sessions with their keep-alive connection pools are shared just within each process since
+# connections can not be used by several processes.
+TOKENS = {}
+HTTP_SESSIONS = {}
+
+# Delays between attempts to send requests when Klever Bridge is unavailable grow exponentially up to this limit.
+MIN_RETRY_DELAY = 0.2
+MAX_RETRY_DELAY = 30
+
 
 class UnexpectedStatusCode(IOError):
     pass
@@ -31,6 +49,13 @@ class BridgeError(IOError):
 
 
 class Session:
+    # Compressed bulks of reports that are larger are spooled to disk.
+    BULK_MEMORY_SIZE = 16 * 1024 * 1024
+    # The maximum number of tasks scheduled by one request.
+    TASKS_BULK_SIZE = 100
+    # Downloaded archives are written by such chunks.
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, logger, bridge, job_id):
         logger.info('Create session for user "{0}" at Klever Bridge "{1}"'.format(bridge['user'], bridge['name']))
 
@@ -44,28 +69,57 @@ class Session:
             'username': bridge['user'],
             'password': bridge['password']
         }
-
-        # Sign in.
-        self.__signin()
+        self.__token_key = (self.name, bridge['user'])
+
+        # Reuse connections to Klever Bridge opened by other sessions of this process. Each session can block waiting
+        # for a free connection if all of them are busy.
+        http_session_key = (os.getpid(), self.name)
+        if http_session_key not in HTTP_SESSIONS:
+            http_session = requests.Session()
+            connections_limit = bridge.get('connections limit', 10)
+            http_session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1,
+                                                                        pool_maxsize=connections_limit,
+                                                                        pool_block=True))
+            HTTP_SESSIONS[http_session_key] = http_session
+        self.session = HTTP_SESSIONS[http_session_key]
+
+        # Sign in unless some session already did this.
+        if self.__token_key not in TOKENS:
+            self.__signin()
 
     def __signin(self):
-        self.session = requests.Session()
         resp = self.__request('service/get_token/', 'POST', data=self.__parameters)
-        self.session.headers.update({'Authorization': 'Token {}'.format(resp.json()['token'])})
+        TOKENS[self.__token_key] = resp.json()['token']
         self.logger.debug('Session was created')
 
     def __request(self, path_url, method, **kwargs):
         url = 'http://' + self.name + '/' + path_url
+        is_signin = path_url == 'service/get_token/'
 
         kwargs.setdefault('allow_redirects', True)
 
         self.logger.debug('Send "{0}" request to "{1}"'.format(method, url))
 
+        attempt = 0
+        is_signed_in_again = False
         while True:
             try:
+                if not is_signin:
+                    kwargs['headers'] = dict(kwargs.get('headers') or {},
+                                             Authorization='Token {}'.format(TOKENS[self.__token_key]))
+
                 resp = self.session.request(method, url, **kwargs)
 
-                if resp.status_code not in (200, 201, 204):
+                # Shared token could be revoked, so get a new one and try again.
+                if resp.status_code == 401 and not is_signin and not is_signed_in_again:
+                    resp.close()
+                    is_signed_in_again = True
+                    self.logger.warning('Token was not accepted by Klever Bridge, sign in once again')
+                    self.__signin()
+                    self.__rewind_files(kwargs)
+                    continue
+
+                if resp.status_code not in (200, 201, 204, 206):
                     if resp.headers['content-type'] == 'application/json':
                         self.error = resp.json()
                         raise BridgeError(
@@ -80,8 +134,20 @@ class Session:
                                                                                                    method, url))
                 return resp
             except requests.ConnectionError:
-                self.logger.warning('Could not send "{0}" request to "{1}"'.format(method, url))
-                time.sleep(0.2)
+                # Do not flood Klever Bridge with requests when it is overloaded or restarted.
+                delay = min(MIN_RETRY_DELAY * 2 ** attempt, MAX_RETRY_DELAY)
+                if delay < MAX_RETRY_DELAY:
+                    attempt += 1
+                self.logger.warning('Could not send "{0}" request to "{1}", try again in {2:.1f} seconds'
+                                    .format(method, url, delay))
+                time.sleep(random.uniform(delay / 2, delay))
+                self.__rewind_files(kwargs)
+
+    @staticmethod
+    def __rewind_files(kwargs):
+        # Files can be read partially or completely at the previous attempt.
+        for fp in kwargs.get('files', {}).values():
+            fp.seek(0)
 
     def start_job_decision(self, job_format, archive):
         self.__download_archive('job', 'jobs/api/download-files/' + self.job_id,
@@ -101,6 +167,32 @@ class Session:
 
         return resp['id']
 
+    def schedule_tasks(self, tasks):
+        """
+        Schedule several tasks by as few requests as possible.
+
+        :param tasks: List of pairs of task description files and task archives.
+        :return: List of task identifiers in the same order.
+        """
+        task_ids = []
+        for i in range(0, len(tasks), self.TASKS_BULK_SIZE):
+            descriptions = []
+            archives = {}
+            for j, (task_file, archive) in enumerate(tasks[i:i + self.TASKS_BULK_SIZE]):
+                with open(task_file, 'r', encoding='utf8') as fp:
+                    descriptions.append(klever.core.utils.json_load(fp))
+                archives['archive {0}'.format(j)] = archive
+
+            resp = self.__upload_archives('service/tasks/bulk/',
+                                          {
+                                              'job': str(self.job_id),
+                                              'descriptions': klever.core.utils.json_dumps_compact(descriptions)
+                                          },
+                                          archives)
+            task_ids.extend(resp['ids'])
+
+        return task_ids
+
     def check_original_sources(self, src_id):
         resp = self.__request('reports/api/has-sources/?identifier={0}'.format(src_id), method='GET')
         return resp.json()['exists']
@@ -109,6 +201,22 @@ class Session:
         resp = self.__request('service/tasks/?job={}&fields=status&fields=id'.format(self.job_id), method='GET')
         return resp.json()
 
+    def get_tasks_changes(self, cursor=None, timeout=0):
+        """
+        Get statuses of tasks changed since the given cursor. Klever Bridge waits for changes up to the given number of
+        seconds. Statuses of some tasks can be returned several times.
+
+        :param cursor: Cursor returned by the previous call or None to get statuses of all tasks.
+        :param timeout: Time to wait for changes in seconds.
+        :return: New cursor and list of task identifiers and statuses.
+        """
+        params = {'timeout': timeout}
+        if cursor:
+            params['cursor'] = cursor
+        resp = self.__request('service/tasks/changes/{0}/'.format(self.job_id), method='GET', params=params)
+        changes = resp.json()
+        return changes['cursor'], changes['tasks']
+
     def get_task_error(self, task_id):
         resp = self.__request('service/tasks/{}/?fields=error'.format(task_id), method='GET')
         return resp.json()['error']
@@ -120,6 +228,12 @@ class Session:
     def remove_task(self, task_id):
         self.__request('service/tasks/{}/'.format(task_id), method='DELETE')
 
+    def remove_tasks(self, task_ids):
+        self.__request('service/tasks/bulk-remove/', method='POST', json={'ids': task_ids})
+
+    def cancel_tasks(self, task_ids):
+        self.__request('service/tasks/bulk-cancel/', method='POST', json={'ids': task_ids})
+
     def sign_out(self):
         self.logger.info('Finish session')
 
@@ -132,54 +246,106 @@ class Session:
         batch_reports = []
         batch_report_file_archives = []
         for report_and_report_file_archives in reports_and_report_file_archives:
-            with open(report_and_report_file_archives['report file'], encoding='utf8') as fp:
-                batch_reports.append(json.load(fp))
+            report = report_and_report_file_archives.get('report')
+            if report is None:
+                with open(report_and_report_file_archives['report file'], encoding='utf8') as fp:
+                    report = klever.core.utils.json_load(fp)
+            batch_reports.append(report)
 
             report_file_archives = report_and_report_file_archives.get('report file archives')
             if report_file_archives:
                 batch_report_file_archives.extend(report_file_archives)
 
-        # TODO: report is likely should be compressed.
-        self.__upload_archives('reports/api/upload/{0}/'.format(self.job_id),
-                               {'reports': json.dumps(batch_reports)},
-                               {os.path.basename(archive): archive for archive in batch_report_file_archives})
+        # Upload reports together with report file archives as a single compressed stream. Archives are compressed
+        # already, so do not spend much CPU time for compressing them once again.
+        with tempfile.SpooledTemporaryFile(max_size=self.BULK_MEMORY_SIZE) as bulk:
+            with tarfile.open(fileobj=bulk, mode='w:gz', compresslevel=1) as tar:
+                reports = klever.core.utils.json_dumps_compact(
+                    batch_reports, False, klever.core.utils.ExtendedJSONEncoder().default).encode('utf8')
+                reports_info = tarfile.TarInfo('reports.json')
+                reports_info.size = len(reports)
+                reports_info.mtime = time.time()
+                tar.addfile(reports_info, io.BytesIO(reports))
+
+                for archive in batch_report_file_archives:
+                    tar.add(archive, os.path.basename(archive))
+
+            self.__upload_archives('reports/api/upload/{0}/'.format(self.job_id), {}, {'bulk': bulk})
 
-        # We can safely remove task and its files after uploading report referencing task files.
-        for report in batch_reports:
-            if 'task identifier' in report:
-                self.remove_task(report['task identifier'])
+        # We can safely remove tasks and their files after uploading reports referencing task files.
+        task_ids = [report['task identifier'] for report in batch_reports if 'task identifier' in report]
+        if task_ids:
+            self.remove_tasks(task_ids)
 
     def submit_progress(self, progress):
         self.logger.info('Submit solution progress')
         self.__request('service/progress/{0}/'.format(self.job_id), 'PATCH', data=progress)
 
     def __download_archive(self, kind, path_url, data=None, archive=None):
-        while True:
-            resp = None
-            try:
-                resp = self.__request(path_url, 'GET', data=data, stream=True)
-
-                self.logger.debug('Write {0} archive to "{1}"'.format(kind, archive))
-                with open(archive, 'wb') as fp:
-                    for chunk in resp.iter_content(1024):
+        # Checksum of the already downloaded part of the archive.
+        md5 = hashlib.md5()
+        offset = 0
+        with open(archive, 'wb') as fp:
+            while True:
+                resp = None
+                try:
+                    headers = {'Range': 'bytes={0}-'.format(offset)} if offset else None
+                    resp = self.__request(path_url, 'GET', data=data, stream=True, headers=headers)
+
+                    # Klever Bridge can ignore the range, e.g. for archives generated on the fly.
+                    if offset and resp.status_code != 206:
+                        self.logger.debug('Download {0} archive from the beginning'.format(kind))
+                        md5 = hashlib.md5()
+                        offset = 0
+
+                    self.logger.debug('Write {0} archive to "{1}" starting from {2}'.format(kind, archive, offset))
+                    fp.seek(offset)
+                    fp.truncate()
+                    for chunk in resp.iter_content(self.DOWNLOAD_CHUNK_SIZE):
                         fp.write(chunk)
-
-                if not zipfile.is_zipfile(archive) or zipfile.ZipFile(archive).testzip():
-                    self.logger.warning('Could not download ZIP archive')
-                else:
-                    break
-            finally:
-                if resp:
-                    resp.close()
+                        md5.update(chunk)
+                        offset += len(chunk)
+                    fp.flush()
+
+                    checksum = resp.headers.get('X-Checksum-MD5')
+                    if checksum:
+                        if md5.hexdigest() == checksum:
+                            break
+                        self.logger.warning('Checksum of downloaded {0} archive does not match'.format(kind))
+                    # Archives generated on the fly have no checksum, so check them as before.
+                    elif zipfile.is_zipfile(archive) and not zipfile.ZipFile(archive).testzip():
+                        break
+                    else:
+                        self.logger.warning('Could not download ZIP archive')
+
+                    md5 = hashlib.md5()
+                    offset = 0
+                except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                    # Continue downloading from the last written chunk if Klever Bridge supports ranges.
+                    if not resp or resp.headers.get('Accept-Ranges') != 'bytes':
+                        md5 = hashlib.md5()
+                        offset = 0
+                    self.logger.warning('Download of {0} archive was interrupted at {1}, try again'
+                                        .format(kind, offset))
+                    time.sleep(MIN_RETRY_DELAY)
+                finally:
+                    if resp:
+                        resp.close()
 
     def __upload_archives(self, path_url, data, archives):
         while True:
             resp = None
             try:
-                resp = self.__request(path_url, 'POST', data=data,
-                                      files={archive_name: open(archive_path, 'rb', buffering=0)
-                                             for archive_name, archive_path in archives.items()},
-                                      stream=True)
+                files = {}
+                for archive_name, archive in archives.items():
+                    # Archives can be given either by paths or by file objects that should be read from the beginning
+                    # at each attempt.
+                    if isinstance(archive, str):
+                        files[archive_name] = open(archive, 'rb', buffering=0)
+                    else:
+                        archive.seek(0)
+                        files[archive_name] = archive
+                resp = self.__request(path_url, 'POST', data=data, files=files, stream=True)
                 return resp.json()
             except BridgeError:
                 if 'ZIP error' in self.error:
@@ -0,0 +1,161 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import logging
+import multiprocessing
+import os
+
+import pytest
+
+import klever.core.components
+import klever.core.utils
+
+
+logger = logging.getLogger('test_components')
+logger.disabled = True
+
+
+class Allocator(klever.core.components.Component):
+    """Component that allocates the given amount of memory (in MB)."""
+
+    size = 0
+
+    def main(self):
+        data = bytearray(self.size * 1024 * 1024)
+        # Touch pages, otherwise they may be not resident.
+        for i in range(0, len(data), 4096):
+            data[i] = 1
+
+
+class Parent(klever.core.components.Component):
+    """Component that runs children allocating the given amount of memory (in MB) within separate processes."""
+
+    children = ()
+
+    def main(self):
+        for i, size in enumerate(self.children):
+            child = type('Child{0}Allocator'.format(i), (Allocator,), {'size': size})(
+                self.conf, self.logger, self.id, self.callbacks, self.mqs, self.vals, separate_from_parent=False)
+            child.start()
+            child.join()
+            if child.exitcode:
+                raise RuntimeError('Child failed')
+
+
+class Marker(klever.core.components.Component):
+    """Component that creates the file with the name of the component within the given directory."""
+
+    size = None
+
+    def main(self):
+        if self.size == 'fail':
+            raise RuntimeError('Component failed')
+        open(os.path.join(self.conf['markers directory'], self.name), 'w').close()
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    reports = []
+    monkeypatch.setattr(klever.core.utils, 'report',
+                        lambda logger, kind, report_data, *args, **kwargs: reports.append((kind, dict(report_data))))
+    return reports
+
+
+def get_component(tmp_path, name, size, component_class=Allocator, **kwargs):
+    conf = {
+        'logging': {'loggers': [{'name': 'default', 'handlers': [{'name': 'console', 'level': 'NONE'}]}]},
+        'main working directory': str(tmp_path),
+        'keep intermediate files': True
+    }
+    work_dir = tmp_path / name
+    work_dir.mkdir()
+    attr = 'children' if component_class is Parent else 'size'
+    component = type('{0}{1}'.format(name, component_class.__name__), (component_class,), {attr: size})(
+        conf, logger, 'parent', {}, {'report files': None}, {'report id': None}, id=name, work_dir=str(work_dir),
+        **kwargs)
+
+    return component
+
+
+def run(component):
+    cwd = os.getcwd()
+    try:
+        return component.run_in_current_process()
+    finally:
+        os.chdir(cwd)
+
+
+def get_finish_reports(reports):
+    return {report['identifier']: report for kind, report in reports if kind == 'finish'}
+
+
+def test_memory_of_components_in_same_process(tmp_path, reports):
+    # Components are executed one by one like persistent queue workers do.
+    assert run(get_component(tmp_path, 'large', 200, separate_from_parent=True)) == os.EX_OK
+    assert run(get_component(tmp_path, 'small', 0, separate_from_parent=True)) == os.EX_OK
+
+    finish_reports = get_finish_reports(reports)
+    assert finish_reports['parent/large']['memory'] >= 200 * 1024 * 1024
+    assert finish_reports['parent/small']['memory'] < finish_reports['parent/large']['memory'] / 2
+
+
+@pytest.mark.parametrize('include_child_resources', (False, True))
+@pytest.mark.parametrize('children', ((), (100,)))
+def test_resources_of_children(tmp_path, reports, include_child_resources, children):
+    component = get_component(tmp_path, 'parent', children, component_class=Parent, separate_from_parent=True,
+                              include_child_resources=include_child_resources)
+    assert run(component) == os.EX_OK
+
+    finish_report = get_finish_reports(reports)['parent/parent']
+    assert finish_report['memory'] > 0
+    # Maximum memory size of children can not be reset within the same process, so it is checked just when children
+    # report it themselves.
+    if children and not include_child_resources:
+        assert finish_report['memory'] >= children[0] * 1024 * 1024
+
+
+@pytest.mark.parametrize('fail_tolerant', (True, False))
+def test_persistent_queue_workers(tmp_path, reports, monkeypatch, fail_tolerant):
+    # Failed components describe problems within the current working directory.
+    monkeypatch.chdir(tmp_path)
+    warnings = []
+    monkeypatch.setattr(logger, 'warning', warnings.append)
+    markers_dir = tmp_path / 'markers'
+    markers_dir.mkdir()
+    elements = ['first', 'second', 'fail', 'no component', 'third', 'fourth']
+    queue = multiprocessing.Queue()
+    for element in elements:
+        queue.put(element)
+    queue.put(None)
+
+    def constructor(element):
+        if element == 'no component':
+            raise ValueError('Cannot create component')
+        component = get_component(tmp_path, element, element, component_class=Marker)
+        component.conf['markers directory'] = str(markers_dir)
+        return component
+
+    if fail_tolerant:
+        klever.core.components.launch_queue_workers(logger, queue, constructor, 2, True, persistent=True)
+        # Failures of components and of their creation do not prevent processing of other elements.
+        assert sorted(os.listdir(markers_dir)) == sorted('{0}Marker'.format(element) for element in elements
+                                                         if element not in ('fail', 'no component'))
+        assert any('"no component"' in warning and 'Cannot create component' in warning for warning in warnings)
+        assert not any('Persistent worker' in warning for warning in warnings)
+    else:
+        with pytest.raises(klever.core.components.ComponentError):
+            klever.core.components.launch_queue_workers(logger, queue, constructor, 2, False, persistent=True)
@@ -0,0 +1,126 @@
+#
+# Copyright (c) 2020 ISP RAS (http://www.ispras.ru)
+# Ivannikov Institute for System Programming of the Russian Academy of Sciences
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import copy
+import json
+import logging
+
+from klever.core.cross_refs import CrossRefs
+from klever.core.highlight import Highlight
+
+
+# Highlighting emits warnings for tokens unknown to it, they are not interesting here.
+logger = logging.getLogger('test_cross_refs')
+logger.disabled = True
+
+
+def overlapping_macro_expansions(lines_numb=200, expansions_numb=20):
+    """
+    Get source file with macro definitions each of which includes many nested macro expansions as well as references
+    from these macro expansions. Macro expansions overlap each other and preprocessor directive highlights.
+    """
+    src = '#define B(x) (x)\n'
+    expansions = []
+    for line_numb in range(2, lines_numb + 2):
+        prefix = '#define A{0}(x) '.format(line_numb)
+        src += prefix + 'B(' * expansions_numb + 'x' + ')' * expansions_numb + '\n'
+        for i in range(expansions_numb):
+            start_offset = len(prefix) + 2 * i
+            # Reference from the macro name and from the whole nested expansion.
+            expansions.append([[line_numb, start_offset, start_offset + 1], ['test.c', [1]]])
+            expansions.append([[line_numb, start_offset, len(prefix) + 4 * expansions_numb - 2 * i + 1],
+                               ['test.c', [1]]])
+
+    return src, expansions
+
+
+def reference_extra_highlight(highlights, extra_highlights):
+    # Straightforward comparison of each extra highlight with all highlights.
+    highlights_to_be_removed = []
+    highlights_to_be_added = []
+    for extra_highlight in extra_highlights:
+        for highlight in highlights:
+            if highlight[1] == extra_highlight[1] and highlight[2] <= extra_highlight[3] \
+                    and highlight[3] >= extra_highlight[2]:
+                highlights_to_be_removed.append(highlight)
+                if highlight[0] == 'CP':
+                    if highlight[2] < extra_highlight[2]:
+                        highlights_to_be_added.append(['CP', highlight[1], highlight[2], extra_highlight[2]])
+                    if extra_highlight[3] < highlight[3]:
+                        highlights_to_be_added.append(['CP', highlight[1], extra_highlight[3], highlight[3]])
+
+    return [highlight for highlight in highlights if highlight not in highlights_to_be_removed] + \
+        list(extra_highlights) + highlights_to_be_added
+
+
+class FakeClade:
+    def __init__(self, refs_to, refs_from):
+        self.refs_to = refs_to
+        self.refs_from = refs_from
+
+    def get_ref_to(self, files):
+        return {files[0]: self.refs_to}
+
+    def get_ref_from(self, files):
+        return {files[0]: self.refs_from}
+
+
+def test_extra_highlight():
+    src, expansions = overlapping_macro_expansions(50, 10)
+    extra_highlights = [['MacroExpansionRefFrom', *expansion[0]] for expansion in expansions]
+
+    highlight = Highlight(logger, src)
+    highlight.highlight()
+    expected = reference_extra_highlight(copy.deepcopy(highlight.highlights), extra_highlights)
+
+    highlight.extra_highlight(extra_highlights)
+    assert highlight.highlights == expected
+
+
+def test_overlapping_highlights():
+    highlight = Highlight(logger, '')
+    highlight.highlights = [['CP', 1, 0, 20], ['N', 1, 2, 4], ['CP', 1, 22, 30], ['N', 2, 0, 3], ['CP', 1, 5, 6]]
+    extra_highlights = [['MacroDefRefTo', 1, 3, 5], ['FuncCallRefFrom', 1, 21, 21], ['FuncCallRefFrom', 3, 0, 1]]
+    expected = reference_extra_highlight(copy.deepcopy(highlight.highlights), extra_highlights)
+
+    highlight.extra_highlight(extra_highlights)
+    assert highlight.highlights == expected
+
+
+def test_cross_refs(tmp_path):
+    src_file = tmp_path / 'test.c'
+    src_file.write_text('#define F f\nint f(void);\nint f(void) { return 0; }\n')
+    clade = FakeClade(
+        {
+            'def_macro': [[[1, 8, 9], ['test.c', 1]]],
+            # The first reference is at the same place as the macro definition reference.
+            'def_func': [[[1, 8, 9], ['test.c', 3]], [[3, 4, 5], ['test.c', 3]]],
+            # The second reference is at the same place as the function definition reference.
+            'decl_func': [[[2, 4, 5], ['test.c', 2]], [[3, 4, 5], ['test.c', 2]]]
+        },
+        {'expand': overlapping_macro_expansions(1, 3)[1]}
+    )
+
+    cross_refs = CrossRefs({'keep intermediate files': True}, logger, clade, 'test.c', str(src_file), [], '')
+    cross_refs.get_cross_refs()
+
+    with open(str(src_file) + '.idx.json') as fp:
+        cross_ref = json.load(fp)
+
+    assert cross_ref['referencesto'] == [[[3, 4, 5], [None, 3]], [[1, 8, 9], [None, 1]]]
+    assert cross_ref['referencestodeclarations'] == [[[2, 4, 5], [None, [2]]]]
+    assert len(cross_ref['referencesfrom']) == 6
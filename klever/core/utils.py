@@ -15,24 +15,42 @@
 # limitations under the License.
 #
 
+import collections
 import fcntl
 import json
 import hashlib
+import itertools
 import logging
+import mmap
+import multiprocessing
 import os
+import pickle
 import re
+import selectors
+import signal
 import subprocess
 import sys
 import zipfile
-import threading
 import time
 import queue
 import tempfile
 import shutil
 import resource
+import struct
 import random
 import string
 
+# Faster JSON encoders and decoders are used for intermediate files when they are available.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 
 class Cd:
     def __init__(self, path):
@@ -80,108 +98,264 @@ class LockedOpen(object):
             pass
 
 
-class StreamQueue:
+# Limitations that execute() enforces when it is requested to do this but a caller does not specify them.
+DEFAULT_EXECUTION_LIMITATIONS = {'CPU time': 450, 'memory size': 1000000000}
+# Period of CPU bandwidth control in microseconds.
+CGROUP_CPU_PERIOD = 100000
+
+
+class OutputStream:
     def __init__(self, stream, stream_name, collect_all_output=False):
         self.stream = stream
         self.stream_name = stream_name
         self.collect_all_output = collect_all_output
-        self.queue = queue.Queue()
         self.finished = False
-        self.traceback = None
-        self.thread = threading.Thread(target=self.__put_lines_from_stream_to_queue)
         self.output = []
+        self.__tail = b''
 
-    def get(self):
-        try:
-            return self.queue.get_nowait()
-        except queue.Empty:
-            return None
+    def read(self):
+        """
+        Read data that is available in the stream. This should be invoked only when the stream is ready for reading,
+        otherwise it will block.
+
+        :return: List of complete lines read.
+        """
+        data = os.read(self.stream.fileno(), 65536)
+
+        if data:
+            *lines, self.__tail = (self.__tail + data).split(b'\n')
+        else:
+            # Nothing will be read from now.
+            self.finished = True
+            lines = [self.__tail] if self.__tail else []
+            self.__tail = b''
+
+        lines = [line.decode('utf8').rstrip() for line in lines]
+        if self.collect_all_output:
+            self.output.extend(lines)
 
-    def join(self):
-        self.thread.join()
+        return lines
 
-    def start(self):
-        self.thread.start()
 
-    def __put_lines_from_stream_to_queue(self):
+class Cgroup:
+    """
+    Control group v2 that is created for a single command within a parent control group delegated to Klever. The parent
+    control group should have "memory" and "cpu" controllers enabled in "cgroup.subtree_control".
+    """
+
+    counter = itertools.count()
+
+    def __init__(self, parent):
+        self.path = os.path.join(parent, 'klever-{0}-{1}'.format(os.getpid(), next(self.counter)))
+        os.mkdir(self.path)
+        self.procs_fd = os.open(os.path.join(self.path, 'cgroup.procs'), os.O_WRONLY)
+
+    def set_limitations(self, limitations):
+        if limitations.get('memory size'):
+            self.__write('memory.max', int(limitations['memory size']))
+            # Otherwise the command will swap rather than exceed the memory limit. Swap accounting can be disabled.
+            if os.path.exists(os.path.join(self.path, 'memory.swap.max')):
+                self.__write('memory.swap.max', 0)
+
+        if limitations.get('number of CPU cores'):
+            self.__write('cpu.max', '{0} {1}'.format(int(limitations['number of CPU cores'] * CGROUP_CPU_PERIOD),
+                                                     CGROUP_CPU_PERIOD))
+
+    def enter(self):
+        # This is invoked in a child process between fork() and exec(), so it should just make a system call.
+        os.write(self.procs_fd, b'0')
+
+    def kill(self):
+        if os.path.exists(os.path.join(self.path, 'cgroup.kill')):
+            self.__write('cgroup.kill', 1)
+        else:
+            for pid in self.__read('cgroup.procs').split():
+                try:
+                    os.kill(int(pid), signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def get_consumed_resources(self):
+        resources = {}
+
+        cpu_stat = dict(line.split() for line in self.__read('cpu.stat').splitlines())
+        resources['CPU time'] = int(cpu_stat['usage_usec']) / 1000000
+
+        # Peak memory usage is accounted since Linux 5.19.
+        if os.path.exists(os.path.join(self.path, 'memory.peak')):
+            resources['memory size'] = int(self.__read('memory.peak'))
+
+        return resources
+
+    def is_oom_killed(self):
+        if not os.path.exists(os.path.join(self.path, 'memory.events')):
+            return False
+
+        memory_events = dict(line.split() for line in self.__read('memory.events').splitlines())
+        return int(memory_events.get('oom_kill', 0)) > 0
+
+    def remove(self, logger):
+        os.close(self.procs_fd)
         try:
-            # This will put lines from stream to queue until stream will be closed. For instance it will happen when
-            # execution of command will be completed.
-            for line in self.stream:
-                line = line.decode('utf8').rstrip()
-                self.queue.put(line)
-                if self.collect_all_output:
-                    self.output.append(line)
-
-            # Nothing will be put to queue from now.
-            self.finished = True
-        except Exception:
-            import traceback
-            self.traceback = traceback.format_exc().rstrip()
+            os.rmdir(self.path)
+        except OSError as error:
+            logger.warning('Cannot remove control group {!r}: {!r}'.format(self.path, error))
+
+    def __read(self, name):
+        with open(os.path.join(self.path, name), encoding='utf8') as fp:
+            return fp.read()
 
+    def __write(self, name, value):
+        with open(os.path.join(self.path, name), 'w', encoding='utf8') as fp:
+            fp.write(str(value))
 
-def execute(logger, args, env=None, cwd=None, timeout=0.1, collect_all_stdout=False, filter_func=None,
-            enforce_limitations=False):
+
+def execute(logger, args, env=None, cwd=None, collect_all_stdout=False, filter_func=None, enforce_limitations=False,
+            limitations=None, cgroup=None, resources=None):
+    """
+    Execute command, log everything that it outputs and exit in case of its failure.
+
+    :param logger: Logger.
+    :param args: Command and its arguments.
+    :param env: Environment.
+    :param cwd: Working directory.
+    :param collect_all_stdout: Whether to return everything that is outputted to STDOUT.
+    :param filter_func: Function to filter STDERR lines to be saved to problem desc.txt in case of failure.
+    :param enforce_limitations: Whether to enforce resource limitations.
+    :param limitations: Dictionary with "CPU time" and "wall time" in seconds, "memory size" in bytes and
+                        "number of CPU cores". Unspecified ones are taken from DEFAULT_EXECUTION_LIMITATIONS.
+    :param cgroup: Directory of a cgroup v2 delegated to Klever. If it is specified, the command is executed in a
+                   separate child control group that limits memory (without limiting address space) and CPU bandwidth
+                   and accounts CPU time and peak memory usage of the command together with its descendants.
+                   Otherwise limitations are enforced via rlimits for CPU time and address space.
+    :param resources: Dictionary to be updated with consumed "CPU time", "wall time" and peak "memory size".
+    :return: List of lines outputted to STDOUT if collect_all_stdout is True and None otherwise.
+    """
     cmd = args[0]
     logger.debug('Execute:\n{0}{1}{2}'.format(cmd,
                                               '' if len(args) == 1 else ' ',
                                               ' '.join('"{0}"'.format(arg) for arg in args[1:])))
 
     if enforce_limitations:
-        # todo: Get these limitations from some config
-        timelimit = 450
-        memlimit = 1000000000
+        # Limitations that are not specified explicitly are taken from defaults.
+        limitations = dict(DEFAULT_EXECUTION_LIMITATIONS, **(limitations or {}))
+        logger.debug('Got the following limitations: {0}'.format(
+            ', '.join('{0}={1}'.format(name, value) for name, value in sorted(limitations.items()))))
+    else:
+        limitations = {}
+
+    group = None
+    if cgroup:
+        try:
+            group = Cgroup(cgroup)
+            group.set_limitations(limitations)
+        except OSError as error:
+            logger.warning('Cannot use control group within {!r}, enforce limitations via rlimits: {!r}'
+                           .format(cgroup, error))
+            if group:
+                group.remove(logger)
+                group = None
+
+    rlimits = []
+    if limitations.get('CPU time'):
+        rlimits.append((resource.RLIMIT_CPU, int(limitations['CPU time'])))
+    if limitations.get('memory size') and not group:
+        rlimits.append((resource.RLIMIT_AS, int(limitations['memory size'])))
+
+    def prepare_child():
+        if group:
+            group.enter()
+        for rlimit, value in rlimits:
+            resource.setrlimit(rlimit, (value, resource.getrlimit(rlimit)[1]))
+
+    # Without a control group the command is executed in a new session, so it can be killed together with its
+    # descendants when it exceeds wall time. Other commands stay within the process group of Core to get its signals.
+    new_session = bool(limitations.get('wall time')) and not group
+
+    p = None
+    try:
+        start_time = time.monotonic()
+        deadline = start_time + limitations['wall time'] if limitations.get('wall time') else None
+        exceeded_limitation = None
+
+        p = subprocess.Popen(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd,
+                             preexec_fn=prepare_child if group or rlimits else None, start_new_session=new_session)
+
+        out_s, err_s = (OutputStream(p.stdout, 'STDOUT', collect_all_stdout), OutputStream(p.stderr, 'STDERR', True))
+
+        # Print to logs everything that is printed to STDOUT and STDERR as soon as it becomes available.
+        with selectors.DefaultSelector() as selector:
+            for stream in (out_s, err_s):
+                selector.register(stream.stream, selectors.EVENT_READ, stream)
+
+            while selector.get_map():
+                if deadline and time.monotonic() >= deadline:
+                    exceeded_limitation = 'wall time'
+                    deadline = None
+                    if group:
+                        group.kill()
+                    else:
+                        try:
+                            os.killpg(p.pid, signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+
+                for key, _ in selector.select(max(deadline - time.monotonic(), 0) if deadline else None):
+                    stream = key.data
+                    output = stream.read()
+                    if stream.finished:
+                        selector.unregister(stream.stream)
+                    if output:
+                        m = '"{0}" outputted to {1}:\n{2}'.format(cmd, stream.stream_name, '\n'.join(output))
+                        if stream is out_s:
+                            logger.debug(m)
+                        else:
+                            logger.warning(m)
+
+        _, status, rusage = os.wait4(p.pid, 0)
+        p.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        for stream in (p.stdout, p.stderr):
+            stream.close()
+
+        consumed_resources = {
+            'CPU time': rusage.ru_utime + rusage.ru_stime,
+            'wall time': time.monotonic() - start_time,
+            'memory size': rusage.ru_maxrss * 1024
+        }
+        if group:
+            consumed_resources.update(group.get_consumed_resources())
+            if group.is_oom_killed():
+                exceeded_limitation = 'memory size'
+    finally:
+        if group:
+            group.kill()
+            group.remove(logger)
+        elif new_session and p and p.returncode is None:
+            # Do not leave the command running in its session if execution was interrupted.
+            try:
+                os.killpg(p.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
 
-        soft_time, hard_time = resource.getrlimit(resource.RLIMIT_CPU)
-        soft_mem, hard_mem = resource.getrlimit(resource.RLIMIT_AS)
-        logger.debug('Got the following limitations: time={}s, memory={}B'.format(timelimit, memlimit))
+    if enforce_limitations or group:
+        logger.debug('"{0}" consumed the following resources: {1}'.format(
+            cmd, ', '.join('{0}={1}'.format(name, value) for name, value in sorted(consumed_resources.items()))))
+    if resources is not None:
+        resources.update(consumed_resources)
 
-    p = subprocess.Popen(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd)
-    if enforce_limitations:
-        resource.prlimit(p.pid, resource.RLIMIT_CPU, [timelimit, hard_time])
-        resource.prlimit(p.pid, resource.RLIMIT_AS, [memlimit, hard_mem])
-
-    out_q, err_q = (StreamQueue(p.stdout, 'STDOUT', collect_all_stdout), StreamQueue(p.stderr, 'STDERR', True))
-
-    for stream_q in (out_q, err_q):
-        stream_q.start()
-
-    # Print to logs everything that is printed to STDOUT and STDERR each timeout seconds. Last try is required to
-    # print last messages queued before command finishes.
-    last_try = True
-    while not out_q.finished or not err_q.finished or last_try:
-        if out_q.traceback:
-            raise RuntimeError('STDOUT reader thread failed with the following traceback:\n{0}'. format(out_q.traceback))
-        if err_q.traceback:
-            raise RuntimeError('STDERR reader thread failed with the following traceback:\n{0}'. format(err_q.traceback))
-        last_try = not out_q.finished or not err_q.finished
-        time.sleep(timeout)
-
-        for stream_q in (out_q, err_q):
-            output = []
-            while True:
-                line = stream_q.get()
-                if line is None:
-                    break
-                output.append(line)
-            if output:
-                m = '"{0}" outputted to {1}:\n{2}'.format(cmd, stream_q.stream_name, '\n'.join(output))
-                if stream_q is out_q:
-                    logger.debug(m)
-                else:
-                    logger.warning(m)
-
-    for stream_q in (out_q, err_q):
-        stream_q.join()
-
-    if p.poll():
-        logger.error('"{0}" exitted with "{1}"'.format(cmd, p.poll()))
+    if p.returncode == -signal.SIGXCPU:
+        exceeded_limitation = 'CPU time'
+
+    if p.returncode:
+        logger.error('"{0}" exitted with "{1}"'.format(cmd, p.returncode))
         with open('problem desc.txt', 'a', encoding='utf8') as fp:
-            out = filter(filter_func, err_q.output) if filter_func else err_q.output
+            if exceeded_limitation:
+                fp.write('"{0}" exceeded {1} limitation\n'.format(cmd, exceeded_limitation))
+            out = filter(filter_func, err_s.output) if filter_func else err_s.output
             fp.write('\n'.join(out))
         sys.exit(1)
     elif collect_all_stdout:
-        return out_q.output
+        return out_s.output
 
 
 def reliable_rmtree(logger, directory):
@@ -209,6 +383,30 @@ def get_search_dirs(main_work_dir, abs_paths=False):
     return tuple(os.path.relpath(search_dir) for search_dir in search_dirs)
 
 
+def get_cache_dir(conf, option, name):
+    """
+    Get a directory to cache data that can be reused by other jobs. Caches are kept within the deployment directory
+    rather than within build bases by default since build bases can be read-only or shared by several deployments.
+
+    :param conf: Configuration.
+    :param option: Name of the configuration option specifying the cache directory explicitly.
+    :param name: Name of the cache.
+    :return: Cache directory.
+    """
+    if conf.get(option):
+        return conf[option]
+
+    # Caching within build bases is convenient when they are moved between deployments together with caches.
+    if conf.get('cache within build base'):
+        return os.path.join(conf['build base'], 'klever {0}'.format(name))
+
+    if 'KLEVER_DEPLOYMENT_DIRECTORY' in os.environ:
+        return os.path.join(os.environ['KLEVER_DEPLOYMENT_DIRECTORY'], 'klever-work', 'cache', name)
+
+    # Without the deployment the cache is reused just within the job.
+    return os.path.join(conf['main working directory'], 'cache', name)
+
+
 # TODO: get value of the second parameter on the basis of passed configuration. Or, even better, implement wrapper around this function in components.Component.
 def find_file_or_dir(logger, main_work_dir, file_or_dir):
     search_dirs = get_search_dirs(main_work_dir)
@@ -443,7 +641,41 @@ class ArchiveFiles:
         self.arcnames = arcnames
         self.archive = None
 
-    def make_archive(self, archive):
+    def snapshot(self, directory):
+        """
+        Hard link (or copy when this is impossible) files and directories to be archived into the specified directory.
+        This allows to make the archive later even if original files and directories will be changed or removed.
+
+        :param directory: Directory for snapshot files and directories.
+        :return: ArchiveFiles object referring to snapshot files and directories.
+        """
+        os.makedirs(directory)
+        files_and_dirs = []
+        arcnames = {}
+        for i, file_or_dir in enumerate(self.files_and_dirs):
+            snapshot = os.path.join(directory, str(i))
+            if os.path.isfile(file_or_dir):
+                os.mkdir(snapshot)
+                snapshot = os.path.join(snapshot, os.path.basename(file_or_dir))
+                self.__link_or_copy(file_or_dir, snapshot)
+                # Keep names of files within archives the same as they would be without snapshotting.
+                arcnames[snapshot] = self.arcnames.get(file_or_dir, file_or_dir)
+            elif os.path.isdir(file_or_dir):
+                shutil.copytree(file_or_dir, snapshot, copy_function=self.__link_or_copy)
+            else:
+                raise NotImplementedError("Cannot interprete a kind of an object {!r}".format(file_or_dir))
+            files_and_dirs.append(snapshot)
+
+        return ArchiveFiles(files_and_dirs, arcnames)
+
+    @staticmethod
+    def __link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    def make_archive(self, archive, fsync=True):
         self.archive = archive
 
         with open(self.archive, mode='w+b', buffering=0) as f:
@@ -462,7 +694,8 @@ class ArchiveFiles:
                     else:
                         raise NotImplementedError("Cannot interprete a kind of an object {!r}".format(file_or_dir))
 
-                os.fsync(zfp.fp)
+                if fsync:
+                    os.fsync(zfp.fp)
 
 
 class ExtendedJSONEncoder(json.JSONEncoder):
@@ -484,44 +717,281 @@ def capitalize_attr_names(attrs):
             capitalize_attr_names(attr['value'])
 
 
+# Klever Core changes these settings before starting components, so that all its child processes inherit them.
+REPORTS_WRITING_SETTINGS = {
+    # Whether producers just queue reports while Reporter archives report files and serializes reports in background.
+    'asynchronous': False,
+    # When written report files are flushed to disk: "file" - just after writing each archive, "batch" - after writing
+    # a batch of reports (for asynchronous writing), "none" - this is up to the operating system.
+    'fsync': 'file',
+    # Whether reports are dumped with indentation and sorted keys or compactly.
+    'pretty': True
+}
+
+
+def set_reports_writing_settings(asynchronous=False, fsync='file', pretty=True):
+    if fsync not in ('file', 'batch', 'none'):
+        raise ValueError('Reports fsync mode "{0}" is not supported, please use either "file", "batch" or "none"'
+                         .format(fsync))
+
+    REPORTS_WRITING_SETTINGS.update({'asynchronous': asynchronous, 'fsync': fsync, 'pretty': pretty})
+
+
+class ReportIdentifiers:
+    """
+    Allocate unique report identifiers without synchronization between processes. Each process uses its own prefix
+    that consists of its PID and its first allocation time (PIDs can be reused during a long job) and numbers reports
+    with a local counter. So, reports of each process are ordered while identifiers of reports of different processes
+    never collide. Forked processes get new prefixes automatically.
+    """
+
+    def __init__(self):
+        self.__pid = None
+        self.__prefix = None
+        self.__counter = None
+
+    def next(self):
+        pid = os.getpid()
+        if pid != self.__pid:
+            self.__pid = pid
+            self.__prefix = '{0}.{1:x}'.format(pid, time.time_ns())
+            self.__counter = itertools.count(1)
+
+        return '{0}.{1}'.format(self.__prefix, next(self.__counter))
+
+
+class SharedDict:
+    """
+    Dictionary with string keys and small picklable values that is placed into anonymous shared memory, so processes
+    forked after its creation read and update it without round trips to a manager process. The table is split into stripes each
+    protected by its own lock and using open addressing. The number of items and the size of each item are bounded,
+    so large objects should be still shared via multiprocessing.Manager().
+    """
+
+    # State of slot, hash of key, size of key and size of value.
+    SLOT_HEADER = struct.Struct('<BQHH')
+    EMPTY, USED, DELETED = range(3)
+
+    def __init__(self, capacity=1024, item_size=256, stripes=16):
+        self.item_size = item_size
+        # Small dictionaries do not need many locks while keys of large ones are distributed between stripes evenly.
+        self.stripes = max(min(stripes, capacity // 8), 1)
+        # Keep half of slots free to make probing short and reserve some more for uneven distribution of keys.
+        self.stripe_slots = 2 * -(-capacity // self.stripes) + 8
+        self.slot_size = self.SLOT_HEADER.size + item_size
+        self.__locks = [multiprocessing.Lock() for _ in range(self.stripes)]
+        # Unlike multiprocessing.shared_memory that appeared in Python 3.8, anonymous mappings are available for all
+        # supported versions and they are removed automatically when all processes using them exit.
+        self.__buf = mmap.mmap(-1, self.stripes * self.stripe_slots * self.slot_size)
+
+    def __getitem__(self, key):
+        stripe, key_hash, key_bytes = self.__locate(key)
+        with self.__locks[stripe]:
+            slot, _ = self.__find(stripe, key_hash, key_bytes)
+            if slot is None:
+                raise KeyError(key)
+            return self.__read_value(slot)
+
+    def __setitem__(self, key, value):
+        stripe, key_hash, key_bytes = self.__locate(key)
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(key_bytes) + len(value_bytes) > self.item_size:
+            raise ValueError('Item with key {!r} takes {} bytes while only {} bytes are available'
+                             .format(key, len(key_bytes) + len(value_bytes), self.item_size))
+
+        with self.__locks[stripe]:
+            slot, free_slot = self.__find(stripe, key_hash, key_bytes)
+            if slot is None:
+                if free_slot is None:
+                    raise ValueError('There is no space for key {!r}'.format(key))
+                slot = free_slot
+
+            offset = slot * self.slot_size
+            self.SLOT_HEADER.pack_into(self.__buf, offset, self.USED, key_hash, len(key_bytes), len(value_bytes))
+            offset += self.SLOT_HEADER.size
+            self.__buf[offset:offset + len(key_bytes) + len(value_bytes)] = key_bytes + value_bytes
+
+    def __delitem__(self, key):
+        stripe, key_hash, key_bytes = self.__locate(key)
+        with self.__locks[stripe]:
+            slot, _ = self.__find(stripe, key_hash, key_bytes)
+            if slot is None:
+                raise KeyError(key)
+            self.__buf[slot * self.slot_size] = self.DELETED
+
+    def __contains__(self, key):
+        stripe, key_hash, key_bytes = self.__locate(key)
+        with self.__locks[stripe]:
+            return self.__find(stripe, key_hash, key_bytes)[0] is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        items = []
+        for stripe in range(self.stripes):
+            with self.__locks[stripe]:
+                for slot in range(stripe * self.stripe_slots, (stripe + 1) * self.stripe_slots):
+                    state, _, key_size, _ = self.SLOT_HEADER.unpack_from(self.__buf, slot * self.slot_size)
+                    if state == self.USED:
+                        offset = slot * self.slot_size + self.SLOT_HEADER.size
+                        items.append((bytes(self.__buf[offset:offset + key_size]).decode('utf8'),
+                                      self.__read_value(slot)))
+        return items
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def unlink(self):
+        """
+        Release shared memory. This should be invoked by the process that created the dictionary when other processes
+        do not use it any more. Otherwise this is done when the dictionary is garbage collected or at exit.
+        """
+        self.__buf.close()
+
+    def __locate(self, key):
+        key_bytes = key.encode('utf8')
+        key_hash = int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+        return key_hash % self.stripes, key_hash, key_bytes
+
+    def __find(self, stripe, key_hash, key_bytes):
+        # Return the slot with the given key (if any) and the first slot where it can be stored otherwise.
+        free_slot = None
+        first_slot = stripe * self.stripe_slots
+        start = key_hash // self.stripes % self.stripe_slots
+        for i in range(self.stripe_slots):
+            slot = first_slot + (start + i) % self.stripe_slots
+            offset = slot * self.slot_size
+            state, slot_hash, key_size, _ = self.SLOT_HEADER.unpack_from(self.__buf, offset)
+            if state == self.EMPTY:
+                return None, free_slot if free_slot is not None else slot
+            elif state == self.DELETED:
+                if free_slot is None:
+                    free_slot = slot
+            elif slot_hash == key_hash and key_size == len(key_bytes):
+                offset += self.SLOT_HEADER.size
+                if self.__buf[offset:offset + key_size] == key_bytes:
+                    return slot, None
+
+        return None, free_slot
+
+    def __read_value(self, slot):
+        offset = slot * self.slot_size
+        _, _, key_size, value_size = self.SLOT_HEADER.unpack_from(self.__buf, offset)
+        offset += self.SLOT_HEADER.size + key_size
+        return pickle.loads(self.__buf[offset:offset + value_size])
+
+
 def report(logger, kind, report_data, mq, report_id, main_work_dir, report_dir='', data_files=None):
     logger.debug('Create {0} report'.format(kind))
 
     # Specify report type.
     report_data.update({'type': kind})
 
-    logger.debug('{0} going to modify report id'.format(kind.capitalize()))
-    with report_id.get_lock():
-        cur_report_id = report_id.value
-        report_id.value += 1
+    cur_report_id = report_id.next()
 
-    prefix = ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(6))
-    archives = []
+    data_files_archive = None
     if 'attrs' in report_data:
         capitalize_attr_names(report_data['attrs'])
 
         if data_files:
-            archive_name = '{} data attributes.zip'.format(cur_report_id)
-            data_zip = os.path.join(main_work_dir, 'reports', archive_name)
-            with open(data_zip, mode='w+b', buffering=0) as f:
-                with zipfile.ZipFile(f, mode='w', compression=zipfile.ZIP_DEFLATED) as zfp:
-                    for df in data_files:
-                        zfp.write(df)
-                    os.fsync(zfp.fp)
-            report_data['attr_data'] = archive_name
-            archives.append(data_zip)
+            data_files_archive = ArchiveFiles(data_files)
+
+    pending_report = {
+        'kind': kind,
+        'data': report_data,
+        'report id': cur_report_id,
+        'main working directory': main_work_dir,
+        'report directory': report_dir,
+        'data files': data_files_archive
+    }
+
+    # Producer just snapshots report files that can be removed soon and queues the report. Reporter will do the rest.
+    if REPORTS_WRITING_SETTINGS['asynchronous'] and mq:
+        logger.debug('{0} snapshot report files'.format(kind.capitalize()))
+        snapshot_dir = tempfile.mkdtemp(prefix='{0} files '.format(cur_report_id),
+                                        dir=os.path.join(main_work_dir, 'reports'))
+        pending_report['snapshot directory'] = snapshot_dir
+        pending_report['report directory'] = os.path.abspath(report_dir)
+
+        archive_files_num = 0
+        process_queue = collections.deque([report_data])
+        while process_queue:
+            elem = process_queue.popleft()
+            if isinstance(elem, dict) or isinstance(elem, list):
+                for key, val in (elem.items() if isinstance(elem, dict) else enumerate(elem)):
+                    if isinstance(val, ArchiveFiles):
+                        elem[key] = val.snapshot(os.path.join(snapshot_dir, str(archive_files_num)))
+                        archive_files_num += 1
+                    else:
+                        process_queue.append(val)
+            elif isinstance(elem, tuple) or isinstance(elem, set):
+                process_queue.extend(elem)
+
+        if data_files_archive:
+            pending_report['data files'] = data_files_archive.snapshot(os.path.join(snapshot_dir, 'data files'))
+
+        mq.put({'pending report': pending_report})
+        logger.debug('{0} report was queued'.format(kind.capitalize()))
+        return None
 
-            # Create symlink to report file in current working directory.
-            cwd_data_zip = os.path.join(report_dir, '{} {} data attributes.zip'.format(prefix, cur_report_id))
-            if os.path.isfile(cwd_data_zip):
-                raise FileExistsError('Report file "{0}" already exists'.format(cwd_data_zip))
-            os.symlink(os.path.relpath(data_zip, report_dir), cwd_data_zip)
-            logger.debug('{0} report was dumped to file "{1}"'.format(kind.capitalize(), cwd_data_zip))
+    report_and_report_file_archives = write_report(logger, pending_report,
+                                                   REPORTS_WRITING_SETTINGS['fsync'] != 'none')
+
+    # Put report file and report file archives to message queue if it is specified.
+    if mq:
+        mq.put(report_and_report_file_archives)
+
+    return report_and_report_file_archives['report file']
+
+
+def write_report(logger, pending_report, fsync=True):
+    """
+    Archive report files, dump the report and create symbolic links to them in the report directory.
+
+    :param logger: Logger object.
+    :param pending_report: Report prepared by report().
+    :param fsync: Whether to flush archives to disk just after writing them.
+    :return: Dictionary with the report file and report file archives.
+    """
+    kind = pending_report['kind']
+    report_data = pending_report['data']
+    cur_report_id = pending_report['report id']
+    main_work_dir = pending_report['main working directory']
+    report_dir = pending_report['report directory']
+
+    prefix = ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(6))
+    archives = []
+    if pending_report['data files']:
+        archive_name = '{} data attributes.zip'.format(cur_report_id)
+        data_zip = os.path.join(main_work_dir, 'reports', archive_name)
+        pending_report['data files'].make_archive(data_zip, fsync)
+        report_data['attr_data'] = archive_name
+        archives.append(data_zip)
+
+        # Create symlink to report file in current working directory.
+        cwd_data_zip = os.path.join(report_dir, '{} {} data attributes.zip'.format(prefix, cur_report_id))
+        if os.path.isfile(cwd_data_zip):
+            raise FileExistsError('Report file "{0}" already exists'.format(cwd_data_zip))
+        os.symlink(os.path.relpath(data_zip, report_dir), cwd_data_zip)
+        logger.debug('{0} report was dumped to file "{1}"'.format(kind.capitalize(), cwd_data_zip))
 
     logger.debug('{0} prepare file archive'.format(kind.capitalize()))
-    process_queue = [report_data]
+    process_queue = collections.deque([report_data])
     while process_queue:
-        elem = process_queue.pop(0)
+        elem = process_queue.popleft()
         if isinstance(elem, dict):
             process_queue.extend(elem.values())
         elif isinstance(elem, list) or isinstance(elem, tuple) or isinstance(elem, set):
@@ -531,13 +1001,13 @@ def report(logger, kind, report_data, mq, report_id, main_work_dir, report_dir='
 
             fp, archive = tempfile.mkstemp(prefix='{0}-'.format(cur_report_id), suffix='.zip',
                                            dir=os.path.join(main_work_dir, 'reports'))
-            elem.make_archive(archive)
+            elem.make_archive(archive, fsync)
             os.close(fp)
 
             archives.append(elem.archive)
 
             # Create symlink to report files archive in current working directory.
-            tmp_name = os.path.splitext('-'.join(os.path.relpath(elem.archive).split('-')[1:]))[0]
+            tmp_name = os.path.splitext('-'.join(os.path.basename(elem.archive).split('-')[1:]))[0]
             cwd_report_files_archive = os.path.join(report_dir, '{0} report files {1}.zip'.format(kind, tmp_name))
             if os.path.isfile(cwd_report_files_archive):
                 raise FileExistsError('Report files archive "{0}" already exists'.format(cwd_report_files_archive))
@@ -546,10 +1016,17 @@ def report(logger, kind, report_data, mq, report_id, main_work_dir, report_dir='
             logger.debug('{0} report files were packed to archive "{1}"'.format(kind.capitalize(),
                                                                                 cwd_report_files_archive))
 
+    # Snapshot files are not needed anymore since they were archived.
+    if 'snapshot directory' in pending_report:
+        shutil.rmtree(pending_report['snapshot directory'])
+
     # Create report file in reports directory.
     report_file = os.path.join(main_work_dir, 'reports', '{0}.json'.format(cur_report_id))
     with open(report_file, 'w', encoding='utf8') as fp:
-        json.dump(report_data, fp, cls=ExtendedJSONEncoder, ensure_ascii=False, sort_keys=True, indent=4)
+        if REPORTS_WRITING_SETTINGS['pretty']:
+            json.dump(report_data, fp, cls=ExtendedJSONEncoder, ensure_ascii=False, sort_keys=True, indent=4)
+        else:
+            json_dump(report_data, fp, False, ExtendedJSONEncoder().default)
 
     # Create symlink to report file in current working directory.
     prefix = ''.join(random.choice(string.ascii_uppercase + string.digits) for _ in range(6))
@@ -559,11 +1036,34 @@ def report(logger, kind, report_data, mq, report_id, main_work_dir, report_dir='
     os.symlink(os.path.relpath(report_file, report_dir), cwd_report_file)
     logger.debug('{0} report was dumped to file "{1}"'.format(kind.capitalize(), cwd_report_file))
 
-    # Put report file and report file archives to message queue if it is specified.
-    if mq:
-        mq.put({'report file': report_file, 'report file archives': archives})
+    # Keep report data as well to upload it without reading report file back.
+    return {'report file': report_file, 'report file archives': archives, 'report': report_data}
 
-    return report_file
+
+def fsync_report_files(reports_and_report_file_archives):
+    """
+    Flush written report files and report file archives to disk at once.
+
+    :param reports_and_report_file_archives: List of dictionaries returned by write_report().
+    """
+    dirs = set()
+    for report_and_report_file_archives in reports_and_report_file_archives:
+        for file in [report_and_report_file_archives['report file']] + \
+                report_and_report_file_archives['report file archives']:
+            fd = os.open(file, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            dirs.add(os.path.dirname(file))
+
+    # Make new directory entries durable as well.
+    for directory in dirs:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
 
 def unique_file_name(file_name, suffix=''):
@@ -702,18 +1202,63 @@ def drain_queue(collection, given_queue):
         return True
 
 
-def json_dump(obj, fp, pretty=True):
+def json_dump(obj, fp, pretty=True, default=None):
     """
-    Save JSON file.
+    Save JSON file. Without pretty printing the fastest available encoder writes JSON compactly and without sorting
+    keys.
 
     :param obj: Some serializable object.
     :param fp: File descriptor.
     :param pretty: pretty printing flag.
+    :param default: Function that gets an object that can not be serialized otherwise and returns its serializable
+                    representation.
     """
     if pretty:
-        json.dump(obj, fp, ensure_ascii=True, sort_keys=True, indent=4)
+        json.dump(obj, fp, ensure_ascii=True, sort_keys=True, indent=4, default=default)
     else:
-        json.dump(obj, fp, ensure_ascii=True)
+        # Non-ASCII characters can be written as is just to UTF-8 files.
+        ensure_ascii = 'utf' not in (getattr(fp, 'encoding', None) or '').lower()
+        fp.write(json_dumps_compact(obj, ensure_ascii, default))
+
+
+def json_dumps_compact(obj, ensure_ascii=True, default=None):
+    """
+    Serialize object to compact JSON using the fastest available encoder.
+
+    :param obj: Some serializable object.
+    :param ensure_ascii: Whether to escape non-ASCII characters.
+    :param default: See json_dump().
+    :return: JSON string.
+    """
+    # Encoders below do not support some types, e.g. sets, so fall back to the standard one in such cases.
+    if orjson and not ensure_ascii:
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode('utf8')
+        except TypeError:
+            pass
+
+    if ujson and not default:
+        try:
+            return ujson.dumps(obj, ensure_ascii=ensure_ascii, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            pass
+
+    return json.dumps(obj, ensure_ascii=ensure_ascii, separators=(',', ':'), default=default)
+
+
+def json_load(fp):
+    """
+    Load JSON file using the fastest available decoder.
+
+    :param fp: File descriptor.
+    :return: Loaded object.
+    """
+    if orjson:
+        return orjson.loads(fp.read())
+    elif ujson:
+        return ujson.load(fp)
+
+    return json.load(fp)
 
 
 def save_program_fragment_description(program_fragment_desc, file_name):
@@ -728,11 +1273,95 @@ def save_program_fragment_description(program_fragment_desc, file_name):
         fp.writelines('\n'.join(sorted(f for grp in program_fragment_desc['grps'] for f in grp['files'])))
 
 
-def get_file_checksum(file_name):
-    hash_sha256 = hashlib.sha256()
+class FileChecksums:
+    """
+    Compute SHA-256 checksums of files and memoize them by file identity, i.e. device, inode, size and modification
+    time, so unchanged files are hashed just once. Memoized checksums can be shared by all processes through the index
+    file where each line keeps file identity and its checksum.
+    """
+
+    # Files of at least this size are mapped into memory rather than read.
+    MMAP_THRESHOLD = 1024 * 1024
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.__checksums = {}
+        self.__index_offset = 0
+
+    def get(self, file_name):
+        key = self.__get_key(os.stat(file_name))
+        checksum = self.__checksums.get(key)
+        if checksum:
+            return checksum
 
-    with open(file_name, 'rb') as fp:
-        for chunk in iter(lambda: fp.read(4096), b""):
-            hash_sha256.update(chunk)
+        if self.index_file:
+            self.__read_index()
+            checksum = self.__checksums.get(key)
+            if checksum:
+                return checksum
 
-    return hash_sha256.hexdigest()
+        with open(file_name, 'rb') as fp:
+            key = self.__get_key(os.fstat(fp.fileno()))
+            checksum = self.__compute(fp, key[2])
+
+            # Do not remember checksums of files that were modified while hashing.
+            if self.__get_key(os.fstat(fp.fileno())) != key:
+                return checksum
+
+        self.__checksums[key] = checksum
+        if self.index_file:
+            self.__write_index(key, checksum)
+
+        return checksum
+
+    def __compute(self, fp, size):
+        hash_sha256 = hashlib.sha256()
+
+        if size >= self.MMAP_THRESHOLD:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hash_sha256.update(mm)
+        else:
+            for chunk in iter(lambda: fp.read(self.READ_SIZE), b''):
+                hash_sha256.update(chunk)
+
+        return hash_sha256.hexdigest()
+
+    def __read_index(self):
+        # Read just lines appended since the previous time.
+        try:
+            with open(self.index_file, 'rb') as fp:
+                fp.seek(self.__index_offset)
+                data = fp.read()
+        except FileNotFoundError:
+            return
+
+        # The last line can be still written by another process.
+        data = data[:data.rfind(b'\n') + 1]
+        self.__index_offset += len(data)
+        for line in data.decode('ascii').splitlines():
+            *key, checksum = line.split()
+            self.__checksums[tuple(int(k) for k in key)] = checksum
+
+    def __write_index(self, key, checksum):
+        # Single small appends are not interleaved, so processes do not need to lock the index.
+        fd = os.open(self.index_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, '{0} {1}\n'.format(' '.join(str(k) for k in key), checksum).encode('ascii'))
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def __get_key(stat):
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+FILE_CHECKSUMS = FileChecksums()
+
+
+def set_file_checksums_index(index_file):
+    FILE_CHECKSUMS.index_file = index_file
+
+
+def get_file_checksum(file_name):
+    return FILE_CHECKSUMS.get(file_name)
@@ -16,7 +16,6 @@
 #
 
 import glob
-import json
 import os
 import queue
 import re
@@ -26,13 +25,12 @@ import xml.etree.ElementTree as ElementTree
 import zipfile
 import multiprocessing
 
-from clade import Clade
-
 from klever.core.vrp.et import import_error_trace
 
 import klever.core.components
 import klever.core.session
 import klever.core.utils
+from klever.core.clade import Clade
 from klever.core.coverage import LCOV
 
 
@@ -97,8 +95,13 @@ class VRP(klever.core.components.Component):
     def __result_processing(self):
         pending = dict()
         # todo: implement them in GUI
-        solution_timeout = 1
+        solution_timeout = self.conf.get('task statuses waiting timeout', 5)
         generation_timeout = 1
+        statuses_cursor = None
+        # Changes committed by transactions that started long before the cursor can be missed, so statuses of all tasks
+        # are requested periodically
+        resync_period = self.conf.get('task statuses resynchronization period', 60)
+        resync_time = time.monotonic() + resync_period
 
         source_paths = self.conf['working source trees']
         self.logger.info('Source paths to be trimmed file names: {0}'.format(source_paths))
@@ -108,6 +111,7 @@ class VRP(klever.core.components.Component):
             self.mqs['processing tasks'].put([status.lower(), task_data, tryattempt, source_paths])
 
         receiving = True
+        unscheduled = []
         session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'])
         try:
             while True:
@@ -122,7 +126,7 @@ class VRP(klever.core.components.Component):
                                     receiving = False
                                     self.logger.info("Expect no tasks to be generated")
                                 else:
-                                    pending[data[0][0]] = data
+                                    unscheduled.append(data)
                                 number += 1
                         except queue.Empty:
                             self.logger.debug("Fetched {} tasks".format(number))
@@ -133,13 +137,28 @@ class VRP(klever.core.components.Component):
                                 receiving = False
                                 self.logger.info("Expect no tasks to be generated")
                             else:
-                                pending[data[0][0]] = data
+                                unscheduled.append(data)
                         except queue.Empty:
                             self.logger.debug("No tasks has come for last 30 seconds")
 
-                # Plan for processing new tasks
+                # Schedule all new tasks at once
+                if unscheduled:
+                    task_ids = session.schedule_tasks([task_files for _, _, task_files in unscheduled])
+                    self.logger.debug("Scheduled {} tasks".format(len(task_ids)))
+                    for task_id, (task_data, tryattempt, _) in zip(task_ids, unscheduled):
+                        task_data[0] = str(task_id)
+                        pending[task_data[0]] = [task_data, tryattempt]
+                    unscheduled = []
+
+                # Plan for processing new tasks. Klever Bridge waits for status changes, so there is no need to sleep
+                # between requests. At the same time, new tasks are collected to be scheduled together at the next
+                # iteration
                 if len(pending) > 0:
-                    tasks_statuses = session.get_tasks_statuses()
+                    if time.monotonic() >= resync_time:
+                        self.logger.debug("Request statuses of all tasks")
+                        statuses_cursor = None
+                        resync_time = time.monotonic() + resync_period
+                    statuses_cursor, tasks_statuses = session.get_tasks_changes(statuses_cursor, solution_timeout)
                     for item in tasks_statuses:
                         task = str(item['id'])
                         if task in pending.keys():
@@ -161,8 +180,6 @@ class VRP(klever.core.components.Component):
                         self.mqs['processing tasks'].put(None)
                     self.mqs['processing tasks'].close()
                     break
-
-                time.sleep(solution_timeout)
         finally:
             session.sign_out()
         self.logger.debug("Shutting down result processing gracefully")
@@ -172,7 +189,8 @@ class VRP(klever.core.components.Component):
 
         # First get QOS resource limitations
         qos_resource_limits = klever.core.utils.read_max_resource_limitations(self.logger, self.conf)
-        self.vals['task solution triples'] = multiprocessing.Manager().dict()
+        # Each worker processes one task at a time.
+        self.vals['task solution triples'] = klever.core.utils.SharedDict(1, item_size=4096)
 
         while True:
             element = self.mqs['processing tasks'].get()
@@ -200,8 +218,10 @@ class VRP(klever.core.components.Component):
                 rp = RP(self.conf, self.logger, self.id, self.callbacks, self.mqs, self.vals, new_id,
                         workdir, attrs, separate_from_parent=True, qos_resource_limits=qos_resource_limits,
                         source_paths=source_paths, element=[status, data])
-                rp.start()
-                rp.join()
+                # Within sub-jobs results are processed in slots shared by all sub-jobs like tasks are generated.
+                with klever.core.components.fair_share_slot():
+                    rp.start()
+                    rp.join()
             except klever.core.components.ComponentError:
                 self.logger.debug("RP that processed {!r}, {!r} failed".format(pf, requirement))
             finally:
@@ -209,6 +229,7 @@ class VRP(klever.core.components.Component):
                 del self.vals['task solution triples']['{}:{}'.format(pf, requirement)]
                 self.mqs['processed tasks'].put((pf, requirement, solution))
 
+        self.vals['task solution triples'].unlink()
         self.logger.info("VRP fetcher finishes its work")
 
     def __get_common_attrs(self):
@@ -476,7 +497,7 @@ class RP(klever.core.components.Component):
             zfp.extractall()
 
         with open('decision results.json', encoding='utf8') as fp:
-            decision_results = json.load(fp)
+            decision_results = klever.core.utils.json_load(fp)
 
         # TODO: specify the computer where the verifier was invoked (this information should be get from BenchExec or VerifierCloud web client.
         log_files_dir = glob.glob(os.path.join('output', 'benchmark*logfiles'))[0]
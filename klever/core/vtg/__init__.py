@@ -26,7 +26,6 @@ import time
 
 import klever.core.components
 import klever.core.utils
-import klever.core.session
 
 from klever.core.vtg.scheduling import Balancer
 
@@ -42,10 +41,15 @@ def __launch_sub_job_components(context):
     context.mqs['program fragment desc files'] = multiprocessing.Queue()
 
 
+@klever.core.components.after_callback
+def __submit_program_fragment_desc_file(context):
+    context.mqs['program fragment desc files'].put(context.pf_desc_file)
+
+
 @klever.core.components.after_callback
 def __prepare_descriptions_file(context):
-    context.mqs['program fragment desc files'].put(
-        os.path.relpath(context.PF_FILE, context.conf['main working directory']))
+    # All program fragments descriptions are submitted already
+    context.mqs['program fragment desc files'].put(None)
 
 
 @klever.core.components.after_callback
@@ -306,43 +310,39 @@ class VTG(klever.core.components.Component):
     def __generate_all_abstract_verification_task_descs(self):
         self.logger.info('Generate all abstract verification task decriptions')
 
-        # Fetch fragment
-        pf_file = self.mqs['program fragment desc files'].get()
-        pf_file = os.path.join(self.conf['main working directory'], pf_file)
-        self.mqs['program fragment desc files'].close()
-
-        if os.path.isfile(pf_file):
-            with open(pf_file, 'r', encoding='utf8') as fp:
-                program_fragment_desc_files = \
-                    [os.path.join(self.conf['main working directory'], pf_file.strip()) for pf_file in fp.readlines()]
-            if not self.conf['keep intermediate files']:
-                os.remove(pf_file)
-        else:
-            raise FileNotFoundError
-
-        # Drop a line to a progress watcher
-        total_pf_descs = len(program_fragment_desc_files)
-        self.mqs['total tasks'].put([self.conf['sub-job identifier'],
-                                     int(total_pf_descs * len(self.req_spec_descs))])
-
         pf_descriptions = dict()
         initial = dict()
+        # Program fragments descriptions are provided as soon as they are ready
+        total_pf_descs = 0
+        more_pf_descs = True
+
+        def fetch_program_fragment_descs():
+            nonlocal total_pf_descs, more_pf_descs
+            program_fragment_desc_files = []
+            more_pf_descs = klever.core.utils.drain_queue(program_fragment_desc_files,
+                                                          self.mqs['program fragment desc files'])
+
+            for program_fragment_desc_file in program_fragment_desc_files:
+                program_fragment_desc_file = os.path.join(self.conf['main working directory'],
+                                                          program_fragment_desc_file)
+                with open(program_fragment_desc_file, encoding='utf8') as fp:
+                    program_fragment_desc = klever.core.utils.json_load(fp)
 
-        # Fetch fragment
-        for program_fragment_desc_file in program_fragment_desc_files:
-            with open(os.path.join(self.conf['main working directory'], program_fragment_desc_file),
-                      encoding='utf8') as fp:
-                program_fragment_desc = json.load(fp)
+                if not self.conf['keep intermediate files']:
+                    os.remove(program_fragment_desc_file)
 
-            if not self.conf['keep intermediate files']:
-                os.remove(os.path.join(self.conf['main working directory'], program_fragment_desc_file))
+                if len(self.req_spec_descs) == 0:
+                    self.logger.warning('Program fragment {0} will not be verified since requirement specifications'
+                                        ' are not specified'.format(program_fragment_desc['id']))
+                else:
+                    pf_descriptions[program_fragment_desc['id']] = program_fragment_desc
+                    initial[program_fragment_desc['id']] = list(self.req_spec_classes.keys())
+            total_pf_descs += len(program_fragment_desc_files)
 
-            if len(self.req_spec_descs) == 0:
-                self.logger.warning('Program fragment {0} will not be verified since requirement specifications'
-                                    ' are not specified'.format(program_fragment_desc['id']))
-            else:
-                pf_descriptions[program_fragment_desc['id']] = program_fragment_desc
-                initial[program_fragment_desc['id']] = list(self.req_spec_classes.keys())
+            if not more_pf_descs:
+                # Drop a line to a progress watcher
+                self.mqs['total tasks'].put([self.conf['sub-job identifier'],
+                                             int(total_pf_descs * len(self.req_spec_descs))])
 
         processing_status = dict()
         delete_ready = dict()
@@ -356,6 +356,9 @@ class VTG(klever.core.components.Component):
         max_tasks = int(self.conf['max solving tasks per sub-job'])
         active_tasks = 0
         while True:
+            if more_pf_descs:
+                fetch_program_fragment_descs()
+
             # Fetch pilot statuses
             pilot_statuses = []
             # This queue will not inform about the end of tasks generation
@@ -501,7 +504,7 @@ class VTG(klever.core.components.Component):
                     if program_fragment_id in delete_ready:
                         del delete_ready[program_fragment_id]
 
-            if active_tasks == 0 and len(pf_descriptions) == 0 and len(initial) == 0:
+            if active_tasks == 0 and len(pf_descriptions) == 0 and len(initial) == 0 and not more_pf_descs:
                 self.mqs['prepare program fragments'].put(None)
                 self.mqs['prepared verification tasks'].close()
                 if not self.conf['keep intermediate files']:
@@ -532,8 +535,12 @@ class VTGWL(klever.core.components.Component):
     def task_generating_loop(self):
         self.logger.info("Start VTGL worker")
         number = klever.core.utils.get_parallel_threads_num(self.logger, self.conf, 'Tasks generation')
+        # "reuse worker processes" makes long-lived worker processes generate tasks one by one rather than starting a
+        # new process for each program fragment and requirement specification. This avoids forking the large VTG
+        # process many times, but memory that is not freed by one VTGW is kept till the end of generation.
         klever.core.components.launch_queue_workers(self.logger, self.mqs['prepare program fragments'],
-                                             self.vtgw_constructor, number, True)
+                                             self.vtgw_constructor, number, True,
+                                             persistent=self.conf.get('reuse worker processes', False))
         self.logger.info("Terminate VTGL worker")
 
     def vtgw_constructor(self, element):
@@ -579,7 +586,6 @@ class VTGW(klever.core.components.Component):
         self.abstract_task_desc_file = None
         self.override_limits = resource_limits
         self.rerun = rerun
-        self.session = klever.core.session.Session(self.logger, self.conf['Klever Bridge'], self.conf['identifier'])
 
     def tasks_generator_worker(self):
         files_list_file = 'files list.txt'
@@ -614,8 +620,6 @@ class VTGW(klever.core.components.Component):
         except Exception:
             self.plugin_fail_processing()
             raise
-        finally:
-            self.session.sign_out()
 
     main = tasks_generator_worker
 
@@ -733,19 +737,20 @@ class VTGW(klever.core.components.Component):
 
             if os.path.isfile(os.path.join(plugin_work_dir, 'task.json')) and \
                os.path.isfile(os.path.join(plugin_work_dir, 'task files.zip')):
-                task_id = self.session.schedule_task(os.path.join(plugin_work_dir, 'task.json'),
-                                                     os.path.join(plugin_work_dir, 'task files.zip'))
                 with open(self.abstract_task_desc_file, 'r', encoding='utf8') as fp:
-                    final_task_data = json.load(fp)
+                    final_task_data = klever.core.utils.json_load(fp)
 
-                # Plan for checking status
+                # VRP will schedule the task together with other ones and then it will check its status. The working
+                # directory is not removed until the task is processed.
                 self.mqs['pending tasks'].put([
-                    [str(task_id), final_task_data["result processing"], self.program_fragment_desc,
+                    [None, final_task_data["result processing"], self.program_fragment_desc,
                      self.req_spec_id, final_task_data['verifier'], final_task_data['additional sources'],
                      final_task_data['verification task files']],
-                    self.rerun
+                    self.rerun,
+                    [os.path.abspath(os.path.join(plugin_work_dir, 'task.json')),
+                     os.path.abspath(os.path.join(plugin_work_dir, 'task files.zip'))]
                 ])
-                self.logger.info("Submitted successfully verification task {} for solution".
+                self.logger.info("Submitted successfully verification task {} for scheduling".
                                  format(os.path.join(plugin_work_dir, 'task.json')))
             else:
                 self.logger.warning("There is no verification task generated by the last plugin, expect {}".
@@ -762,8 +767,18 @@ class VTGW(klever.core.components.Component):
         try:
             ret = super(VTGW, self).join(timeout, stopped)
         finally:
-            if not self.conf['keep intermediate files'] and not self.is_alive():
-                self.logger.debug("Indicate that the working directory can be deleted for: {!r}, {!r}".
-                                  format(self.program_fragment_desc['id'], self.req_spec_id))
-                self.mqs['delete dir'].put([self.program_fragment_desc['id'], self.req_spec_id])
+            if not self.is_alive():
+                self.__indicate_deletable_work_dir()
         return ret
+
+    def run_in_current_process(self):
+        try:
+            return super(VTGW, self).run_in_current_process()
+        finally:
+            self.__indicate_deletable_work_dir()
+
+    def __indicate_deletable_work_dir(self):
+        if not self.conf['keep intermediate files']:
+            self.logger.debug("Indicate that the working directory can be deleted for: {!r}, {!r}".
+                              format(self.program_fragment_desc['id'], self.req_spec_id))
+            self.mqs['delete dir'].put([self.program_fragment_desc['id'], self.req_spec_id])
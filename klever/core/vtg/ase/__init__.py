@@ -17,11 +17,11 @@
 
 import fileinput
 import os
-from clade import Clade
 
 import klever.core.utils
 import klever.core.vtg.plugins
 import klever.core.vtg.utils
+from klever.core.clade import Clade
 
 
 class ASE(klever.core.vtg.plugins.Plugin):
@@ -19,8 +19,8 @@ import os
 import re
 import ujson
 import sortedcontainers
-from clade import Clade
 
+from klever.core.clade import Clade
 from klever.core.vtg.emg.common.c import Function, Variable, Macro, import_declaration
 from klever.core.vtg.emg.common.c.types import import_typedefs, extract_name
 from klever.core.vtg.utils import find_file_or_dir
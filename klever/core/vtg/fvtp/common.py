@@ -72,7 +72,8 @@ def merge_files(logger, conf, abstract_task_desc):
             if 'C file' in extra_c_file
            ]
 
-    klever.core.utils.execute(logger, args=args, enforce_limitations=True)
+    klever.core.utils.execute(logger, args=args, enforce_limitations=True, limitations=conf.get('CIL resource limits'),
+                              cgroup=conf.get('tools cgroup'))
     # There will be empty file if CIL succeeded. Remove it to avoid unknown reports of whole FVTP later.
     if os.path.isfile('problem desc.txt'):
         os.unlink('problem desc.txt')
@@ -15,7 +15,6 @@
 # limitations under the License.
 #
 
-import json
 import os
 
 import klever.core.components
@@ -31,7 +30,7 @@ class Plugin(klever.core.components.Component):
         self.logger.info(
             'Get abstract verification task description from file "{0}"'.format(in_abstract_task_desc_file))
         with open(in_abstract_task_desc_file, encoding='utf8') as fp:
-            self.abstract_task_desc = json.load(fp)
+            self.abstract_task_desc = klever.core.utils.json_load(fp)
 
         self.logger.info('Start processing of abstract verification task "{0}"'.format(self.abstract_task_desc['id']))
         klever.core.components.Component.run(self)
@@ -16,11 +16,11 @@
 #
 
 import os
-from clade import Clade
 
 import klever.core.utils
 import klever.core.vtg.plugins
 import klever.core.vtg.utils
+from klever.core.clade import Clade
 
 
 class RSG(klever.core.vtg.plugins.Plugin):
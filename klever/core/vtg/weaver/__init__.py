@@ -23,6 +23,7 @@ import shutil
 
 from clade import Clade
 
+import klever.core.clade
 import klever.core.utils
 import klever.core.vtg.utils
 import klever.core.vtg.plugins
@@ -40,7 +41,7 @@ class Weaver(klever.core.vtg.plugins.Plugin):
     def weave(self):
         self.abstract_task_desc.setdefault('extra C files', dict())
 
-        clade = Clade(self.conf['build base'])
+        clade = klever.core.clade.Clade(self.conf['build base'])
         if not clade.work_dir_ok():
             raise RuntimeError('Build base is not OK')
         meta = clade.get_meta()
@@ -253,7 +254,8 @@ class Weaver(klever.core.vtg.plugins.Plugin):
     def __get_cross_refs(self, storage_path, opts, outfile, clade, cwd, aspectator_search_dir):
         # Get cross references and everything required for them.
         # Limit parallel workers in Clade by 4 since at this stage there may be several parallel task generators and we
-        # prefer their parallelism over the Clade default one.
+        # prefer their parallelism over the Clade default one. This Clade base is specific for the given model, so there
+        # is no sense to query it through the Clade service.
         clade_extra = Clade(work_dir=os.path.realpath(outfile + ' clade'), conf={'cpu_count': 4})
         # TODO: this can be incorporated into instrumentation above but it will need some Clade changes.
         # Emulate normal compilation (indeed just parsing thanks to "-fsyntax-only") to get additional